@@ -0,0 +1,43 @@
+"""activity events
+
+Revision ID: 003
+Revises: 002
+Create Date: 2024-04-12 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '003'
+down_revision: Union[str, None] = '002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Activity Events (populate with `python -m app.cli rebuild-activity`)
+    op.create_table('activity_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=True),
+        sa.Column('dog_names', postgresql.ARRAY(sa.Text()), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_activity_events_user_id_users')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_activity_events')),
+        sa.UniqueConstraint('type', 'entity_id', name=op.f('uq_activity_events_type'))
+    )
+    op.create_index('ix_activity_events_user_feed', 'activity_events',
+        ['user_id', sa.text('occurred_at DESC'), sa.text('type DESC'), sa.text('entity_id DESC')], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_activity_events_user_feed', table_name='activity_events')
+    op.drop_table('activity_events')
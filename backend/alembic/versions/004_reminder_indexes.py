@@ -0,0 +1,31 @@
+"""reminder indexes
+
+Revision ID: 004
+Revises: 003
+Create Date: 2024-04-14 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '004'
+down_revision: Union[str, None] = '003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_care_tasks_next_due_date_active', 'care_tasks', ['next_due_date'], unique=False,
+        postgresql_where=sa.text('is_active'))
+    op.create_index(op.f('ix_vaccinations_valid_until'), 'vaccinations', ['valid_until'], unique=False)
+    op.create_index(op.f('ix_vet_visits_date'), 'vet_visits', ['date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_vet_visits_date'), table_name='vet_visits')
+    op.drop_index(op.f('ix_vaccinations_valid_until'), table_name='vaccinations')
+    op.drop_index('ix_care_tasks_next_due_date_active', table_name='care_tasks')
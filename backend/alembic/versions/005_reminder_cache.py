@@ -0,0 +1,53 @@
+"""reminder cache
+
+Revision ID: 005
+Revises: 004
+Create Date: 2024-04-20 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '005'
+down_revision: Union[str, None] = '004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Reminder Entries
+    op.create_table('reminder_entries',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('type', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('title', sa.String(), nullable=False),
+        sa.Column('dog_name', sa.String(), nullable=False),
+        sa.Column('is_deleted', sa.Boolean(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_reminder_entries_user_id_users')),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_reminder_entries')),
+        sa.UniqueConstraint('user_id', 'type', 'entity_id', name=op.f('uq_reminder_entries_user_id'))
+    )
+    op.create_index('ix_reminder_entries_user_updated', 'reminder_entries', ['user_id', 'updated_at'], unique=False)
+
+    # Reminder Cache States
+    op.create_table('reminder_cache_states',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('computed_on', sa.Date(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('changed_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_reminder_cache_states_user_id_users')),
+        sa.PrimaryKeyConstraint('user_id', name=op.f('pk_reminder_cache_states'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('reminder_cache_states')
+    op.drop_index('ix_reminder_entries_user_updated', table_name='reminder_entries')
+    op.drop_table('reminder_entries')
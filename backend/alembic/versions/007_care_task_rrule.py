@@ -0,0 +1,26 @@
+"""care task rrule
+
+Revision ID: 007
+Revises: 006
+Create Date: 2024-05-02 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '007'
+down_revision: Union[str, None] = '006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('care_tasks', sa.Column('rrule', sa.String(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('care_tasks', 'rrule')
@@ -0,0 +1,47 @@
+"""walk tracks
+
+Revision ID: 008
+Revises: 007
+Create Date: 2024-05-10 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '008'
+down_revision: Union[str, None] = '007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('walks', sa.Column('track_duration_seconds', sa.Integer(), nullable=True))
+    op.add_column('walks', sa.Column('elevation_gain_m', sa.Float(), nullable=True))
+    op.add_column('walks', sa.Column('min_lat', sa.Float(), nullable=True))
+    op.add_column('walks', sa.Column('min_lon', sa.Float(), nullable=True))
+    op.add_column('walks', sa.Column('max_lat', sa.Float(), nullable=True))
+    op.add_column('walks', sa.Column('max_lon', sa.Float(), nullable=True))
+
+    # Walk Tracks
+    op.create_table('walk_tracks',
+        sa.Column('walk_id', sa.Integer(), nullable=False),
+        sa.Column('point_count', sa.Integer(), nullable=False),
+        sa.Column('data', sa.LargeBinary(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['walk_id'], ['walks.id'], name=op.f('fk_walk_tracks_walk_id_walks')),
+        sa.PrimaryKeyConstraint('walk_id', name=op.f('pk_walk_tracks'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('walk_tracks')
+    op.drop_column('walks', 'max_lon')
+    op.drop_column('walks', 'max_lat')
+    op.drop_column('walks', 'min_lon')
+    op.drop_column('walks', 'min_lat')
+    op.drop_column('walks', 'elevation_gain_m')
+    op.drop_column('walks', 'track_duration_seconds')
@@ -0,0 +1,40 @@
+"""walk cells
+
+Revision ID: 009
+Revises: 008
+Create Date: 2024-05-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '009'
+down_revision: Union[str, None] = '008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_walks_user_bbox', 'walks', ['user_id', 'min_lat', 'max_lat', 'min_lon', 'max_lon'], unique=False)
+
+    # Walk Cells
+    op.create_table('walk_cells',
+        sa.Column('walk_id', sa.Integer(), nullable=False),
+        sa.Column('cell_x', sa.Integer(), nullable=False),
+        sa.Column('cell_y', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['walk_id'], ['walks.id'], name=op.f('fk_walk_cells_walk_id_walks')),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], name=op.f('fk_walk_cells_user_id_users')),
+        sa.PrimaryKeyConstraint('walk_id', 'cell_x', 'cell_y', name=op.f('pk_walk_cells'))
+    )
+    op.create_index('ix_walk_cells_user_cell', 'walk_cells', ['user_id', 'cell_y', 'cell_x'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_walk_cells_user_cell', table_name='walk_cells')
+    op.drop_table('walk_cells')
+    op.drop_index('ix_walks_user_bbox', table_name='walks')
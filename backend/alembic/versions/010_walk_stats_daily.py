@@ -0,0 +1,35 @@
+"""walk stats daily
+
+Revision ID: 010
+Revises: 009
+Create Date: 2024-05-26 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '010'
+down_revision: Union[str, None] = '009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Walk Stats Daily (populate with `python -m app.cli rebuild-walk-stats`)
+    op.create_table('walk_stats_daily',
+        sa.Column('dog_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('walk_count', sa.Integer(), nullable=False),
+        sa.Column('total_minutes', sa.Integer(), nullable=False),
+        sa.Column('total_distance_km', sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(['dog_id'], ['dogs.id'], name=op.f('fk_walk_stats_daily_dog_id_dogs')),
+        sa.PrimaryKeyConstraint('dog_id', 'day', name=op.f('pk_walk_stats_daily'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('walk_stats_daily')
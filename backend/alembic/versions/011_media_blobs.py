@@ -0,0 +1,33 @@
+"""media blobs
+
+Revision ID: 011
+Revises: 010
+Create Date: 2024-06-02 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '011'
+down_revision: Union[str, None] = '010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Media Blobs (recounted by `python -m app.cli sweep-media`)
+    op.create_table('media_blobs',
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.BigInteger(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('path', name=op.f('pk_media_blobs'))
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('media_blobs')
@@ -0,0 +1,26 @@
+"""dog avatar renditions
+
+Revision ID: 012
+Revises: 011
+Create Date: 2024-06-08 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '012'
+down_revision: Union[str, None] = '011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('dogs', sa.Column('avatar_renditions', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('dogs', 'avatar_renditions')
@@ -0,0 +1,51 @@
+"""foreign key indexes
+
+Revision ID: 013
+Revises: 012
+Create Date: 2024-06-15 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '013'
+down_revision: Union[str, None] = '012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (name, table, columns); built CONCURRENTLY so writes continue meanwhile.
+# A failed concurrent build leaves an INVALID index behind that has to be
+# dropped before running this again.
+INDEXES = [
+    ('ix_vet_visits_dog_date', 'vet_visits', ['dog_id', 'date']),
+    ('ix_vaccinations_dog_date', 'vaccinations', ['dog_id', 'date']),
+    ('ix_invoices_dog_id', 'invoices', ['dog_id']),
+    ('ix_invoices_vet_visit_id', 'invoices', ['vet_visit_id']),
+    ('ix_care_tasks_dog_id', 'care_tasks', ['dog_id']),
+    ('ix_care_task_logs_task_done', 'care_task_logs', ['care_task_id', 'done_at']),
+    ('ix_training_goals_dog_id', 'training_goals', ['dog_id']),
+    ('ix_behavior_issues_dog_id', 'behavior_issues', ['dog_id']),
+    ('ix_training_logs_dog_datetime', 'training_logs', ['dog_id', 'datetime']),
+    ('ix_training_logs_training_goal_id', 'training_logs', ['training_goal_id']),
+    ('ix_training_logs_behavior_issue_id', 'training_logs', ['behavior_issue_id']),
+    ('ix_equipment_items_dog_id', 'equipment_items', ['dog_id']),
+    ('ix_walk_dogs_dog_walk', 'walk_dogs', ['dog_id', 'walk_id']),
+    ('ix_tag_assignments_entity', 'tag_assignments', ['entity_type', 'entity_id']),
+    ('ix_tag_assignments_tag_id', 'tag_assignments', ['tag_id']),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
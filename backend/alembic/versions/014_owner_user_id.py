@@ -0,0 +1,67 @@
+"""owner_user_id on dog-owned tables
+
+Revision ID: 014
+Revises: 013
+Create Date: 2024-06-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '014'
+down_revision: Union[str, None] = '013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+DOG_TABLES = [
+    'vet_visits', 'vaccinations', 'care_tasks',
+    'training_goals', 'behavior_issues', 'training_logs', 'equipment_items',
+]
+TABLES = DOG_TABLES + ['invoices', 'care_task_logs']
+
+
+def upgrade() -> None:
+    for table in TABLES:
+        op.add_column(table, sa.Column('owner_user_id', sa.Integer(), nullable=True))
+
+    # Backfill from the owning dog
+    for table in DOG_TABLES:
+        op.execute(f"""
+            UPDATE {table} SET owner_user_id = dogs.owner_user_id
+            FROM dogs WHERE dogs.id = {table}.dog_id
+        """)
+    op.execute("""
+        UPDATE invoices SET owner_user_id = dogs.owner_user_id
+        FROM dogs WHERE dogs.id = invoices.dog_id
+    """)
+    op.execute("""
+        UPDATE invoices SET owner_user_id = dogs.owner_user_id
+        FROM vet_visits JOIN dogs ON dogs.id = vet_visits.dog_id
+        WHERE vet_visits.id = invoices.vet_visit_id AND invoices.owner_user_id IS NULL
+    """)
+    op.execute("""
+        UPDATE care_task_logs SET owner_user_id = care_tasks.owner_user_id
+        FROM care_tasks WHERE care_tasks.id = care_task_logs.care_task_id
+    """)
+
+    for table in TABLES:
+        op.alter_column(table, 'owner_user_id', nullable=False)
+        op.create_foreign_key(op.f(f'fk_{table}_owner_user_id_users'), table, 'users', ['owner_user_id'], ['id'])
+
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.create_index(op.f(f'ix_{table}_owner_user_id'), table, ['owner_user_id'], unique=False,
+                postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for table in reversed(TABLES):
+            op.drop_index(op.f(f'ix_{table}_owner_user_id'), table_name=table, postgresql_concurrently=True)
+    for table in reversed(TABLES):
+        op.drop_constraint(op.f(f'fk_{table}_owner_user_id_users'), table, type_='foreignkey')
+        op.drop_column(table, 'owner_user_id')
@@ -0,0 +1,28 @@
+"""care task rrule series start
+
+Revision ID: 015
+Revises: 014
+Create Date: 2024-06-29 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '015'
+down_revision: Union[str, None] = '014'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('care_tasks', sa.Column('dtstart', sa.Date(), nullable=True))
+    # Existing series restart from their current due date
+    op.execute("UPDATE care_tasks SET dtstart = next_due_date WHERE rrule IS NOT NULL")
+
+
+def downgrade() -> None:
+    op.drop_column('care_tasks', 'dtstart')
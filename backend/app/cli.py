@@ -0,0 +1,159 @@
+"""Maintenance commands.
+
+Run inside the backend container, e.g.
+    docker compose exec backend python -m app.cli rebuild-activity
+"""
+import argparse
+import asyncio
+from datetime import date, timedelta
+from sqlalchemy import select
+from app.core.database import AsyncSessionLocal
+from app.models.walks import Walk, WalkTrack
+from app.services.activity import rebuild_activity
+from app.services.walk_stats import rebuild_walk_stats
+from app.services.gpx import ingest_gpx, decode_track
+from app.services.heatmap import invalidate_tiles, walk_bbox
+from app.services.tracks import save_walk_track, index_walk_track
+from app.services.media import media_path, sweep_media
+from app.services.avatars import INVALID_IMAGE_ERRORS, create_renditions, replace_renditions, start_pool, shutdown_pool
+from app.services.query_plans import verify_access_paths
+from app.services.transfer import transfer_dog
+from app.services.reminders import refresh_user_reminders
+from app.models.dogs import Dog
+
+async def cmd_rebuild_activity(args):
+    async with AsyncSessionLocal() as db:
+        count = await rebuild_activity(db, args.user_id)
+        await db.commit()
+    print(f"Rebuilt {count} activity events")
+
+async def cmd_rebuild_walk_stats(args):
+    async with AsyncSessionLocal() as db:
+        count = await rebuild_walk_stats(db, args.user_id)
+        await db.commit()
+    print(f"Rebuilt {count} walk stats buckets")
+
+async def cmd_ingest_gpx(args):
+    async with AsyncSessionLocal() as db:
+        query = select(Walk).where(Walk.gpx_file_url != None)
+        if not args.all:
+            query = query.outerjoin(WalkTrack).where(WalkTrack.walk_id == None)
+        walks = (await db.execute(query)).scalars().all()
+        for walk in walks:
+            path = str(media_path(walk.gpx_file_url))
+            try:
+                ingested = await asyncio.to_thread(ingest_gpx, path)
+            except (OSError, ValueError) as e:
+                print(f"Walk {walk.id}: skipped ({e})")
+                continue
+            previous_bbox = walk_bbox(walk)
+            await save_walk_track(db, walk, ingested)
+            await db.commit()
+            await asyncio.to_thread(invalidate_tiles, walk.user_id, [previous_bbox, walk_bbox(walk)])
+    print(f"Processed {len(walks)} walks")
+
+async def cmd_index_walks(args):
+    async with AsyncSessionLocal() as db:
+        walks = (await db.execute(select(Walk).join(WalkTrack))).scalars().all()
+        for walk in walks:
+            track = await db.get(WalkTrack, walk.id)
+            points = await asyncio.to_thread(decode_track, track.data)
+            await index_walk_track(db, walk, points)
+            await db.commit()
+    print(f"Indexed {len(walks)} walks")
+
+async def cmd_render_avatars(args):
+    async with AsyncSessionLocal() as db:
+        query = select(Dog).where(Dog.avatar_image_url != None)
+        if not args.all:
+            query = query.where(Dog.avatar_renditions == None)
+        dogs = (await db.execute(query)).scalars().all()
+        start_pool()
+        try:
+            for dog in dogs:
+                try:
+                    renditions = await create_renditions(str(media_path(dog.avatar_image_url)))
+                except INVALID_IMAGE_ERRORS as e:
+                    print(f"Dog {dog.id}: skipped ({e})")
+                    continue
+                await replace_renditions(db, dog.avatar_renditions, renditions)
+                dog.avatar_renditions = renditions
+                await db.commit()
+        finally:
+            shutdown_pool()
+    print(f"Processed {len(dogs)} avatars")
+
+async def cmd_sweep_media(args):
+    async with AsyncSessionLocal() as db:
+        files = await sweep_media(db, timedelta(hours=args.grace_hours), args.dry_run)
+    for path in files:
+        print(f"{'Would remove' if args.dry_run else 'Removed'} {path}")
+    print(f"{len(files)} unreferenced media files")
+
+async def cmd_verify_indexes(args):
+    async with AsyncSessionLocal() as db:
+        results = await verify_access_paths(db)
+    missing = 0
+    for name, tables in results:
+        if tables:
+            missing += 1
+            print(f"{name}: full scan of {', '.join(sorted(set(tables)))}")
+        else:
+            print(f"{name}: ok")
+    if missing:
+        raise SystemExit(f"{missing} access paths without an index")
+
+async def cmd_transfer_dog(args):
+    async with AsyncSessionLocal() as db:
+        dog = await db.get(Dog, args.dog_id)
+        if dog is None:
+            raise SystemExit(f"Dog {args.dog_id} not found")
+        previous_owner = dog.owner_user_id
+        await transfer_dog(db, dog, args.to_user_id)
+        # Running workers only recompute reminders daily or after their own writes
+        for user_id in (previous_owner, args.to_user_id):
+            await refresh_user_reminders(db, user_id, date.today())
+        await db.commit()
+    print(f"Dog {args.dog_id} moved from user {previous_owner} to user {args.to_user_id}")
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-activity", help="Backfill/rebuild the activity_events table")
+    rebuild.add_argument("--user-id", type=int, default=None, help="Only rebuild the feed of this user")
+    rebuild.set_defaults(handler=cmd_rebuild_activity)
+
+    stats = commands.add_parser("rebuild-walk-stats", help="Backfill/rebuild the walk_stats_daily rollup")
+    stats.add_argument("--user-id", type=int, default=None, help="Only rebuild the dogs of this user")
+    stats.set_defaults(handler=cmd_rebuild_walk_stats)
+
+    ingest = commands.add_parser("ingest-gpx", help="Parse stored GPX files into compact walk tracks and index them")
+    ingest.add_argument("--all", action="store_true", help="Re-ingest walks that already have a track")
+    ingest.set_defaults(handler=cmd_ingest_gpx)
+
+    index = commands.add_parser("index-walks", help="Rebuild the walk_cells spatial index from stored tracks")
+    index.set_defaults(handler=cmd_index_walks)
+
+    avatars = commands.add_parser("render-avatars", help="Generate avatar renditions for dogs without them")
+    avatars.add_argument("--all", action="store_true", help="Regenerate existing renditions too")
+    avatars.set_defaults(handler=cmd_render_avatars)
+
+    sweep = commands.add_parser("sweep-media", help="Recount media references and delete unreferenced blobs")
+    sweep.add_argument("--grace-hours", type=float, default=24, help="Keep unreferenced blobs this long (in-flight uploads)")
+    sweep.add_argument("--dry-run", action="store_true", help="Only list the files that would be removed")
+    sweep.set_defaults(handler=cmd_sweep_media)
+
+    verify = commands.add_parser("verify-indexes", help="EXPLAIN the main route queries and fail on full table scans")
+    verify.set_defaults(handler=cmd_verify_indexes)
+
+    transfer = commands.add_parser("transfer-dog", help="Move a dog and all its records to another user")
+    transfer.add_argument("--dog-id", type=int, required=True)
+    transfer.add_argument("--to-user-id", type=int, required=True)
+    transfer.set_defaults(handler=cmd_transfer_dog)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,57 @@ from typing import Optional
 class Settings(BaseSettings):
     PROJECT_NAME: str = "Dog Management API"
     API_V1_STR: str = "/api/v1"
+    DEBUG: bool = False
+    # With DEBUG, warn when one request runs the same statement more often
+    N_PLUS_ONE_THRESHOLD: int = 10
     
     DATABASE_URL: str
+    # Optional streaming replica for read-only endpoints
+    DATABASE_READ_URL: Optional[str] = None
+    READ_YOUR_WRITES_SECONDS: float = 10
+    # Per worker process; max connections is workers * (size + overflow)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statements cached per connection
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Disables prepared statement caching, required behind pgbouncer in
+    # transaction pooling mode
+    DB_PGBOUNCER_TRANSACTION_MODE: bool = False
+    # Bearer token for /internal/metrics; the endpoint is off when unset
+    METRICS_TOKEN: Optional[str] = None
+
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 32
+    PASSWORD_HASH_QUEUE_TIMEOUT_SECONDS: float = 10
+
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: float = 60
+    OWNERSHIP_CACHE_SIZE: int = 10000
+    OWNERSHIP_CACHE_TTL_SECONDS: float = 300
+    # Accept a valid access token without looking the user up at all, so a
+    # deleted user keeps access until the token expires
+    AUTH_TRUST_TOKEN_CLAIMS: bool = False
+
+    REMINDER_HORIZON_DAYS: int = 365
+    REMINDER_TOMBSTONE_DAYS: int = 30
+
+    MEDIA_ROOT: str = "/app/media"
+    MAX_GPX_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    MAX_AVATAR_UPLOAD_BYTES: int = 10 * 1024 * 1024
+    MAX_INVOICE_UPLOAD_BYTES: int = 20 * 1024 * 1024
+    AVATAR_WORKERS: int = 2
+
+    # Regenerable derived files (map tiles), not served directly
+    CACHE_DIR: str = "/app/cache"
     
     class Config:
         case_sensitive = True
@@ -1,17 +1,99 @@
+import time
+import uuid
+from typing import Dict
+import orjson
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
+from app.core.pool import InstrumentedPool, PoolMetrics
 
-engine = create_async_engine(settings.DATABASE_URL, echo=False)
+def json_serializer(value) -> str:
+    return orjson.dumps(value).decode("utf-8")
+
+def connect_args() -> dict:
+    if settings.DB_PGBOUNCER_TRANSACTION_MODE:
+        # A transaction-mode bouncer hands each transaction to any server
+        # connection, where our named prepared statements do not exist
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    return {
+        "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+    }
+
+def create_engine(url: str):
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args=connect_args(),
+        json_serializer=json_serializer,
+        json_deserializer=orjson.loads,
+    )
+    engine.pool.metrics = PoolMetrics()
+    return engine
+
+engine = create_engine(settings.DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     engine, class_=AsyncSession, expire_on_commit=False
 )
 
+# Replica for read-only handlers, the primary when none is configured
+read_engine = create_engine(settings.DATABASE_READ_URL) if settings.DATABASE_READ_URL else engine
+
+ReadSessionLocal = sessionmaker(
+    read_engine, class_=AsyncSession, expire_on_commit=False
+)
+
+# Read-your-writes: users who committed a write in the last
+# READ_YOUR_WRITES_SECONDS read from the primary. Tracked per worker
+# process, a request served by another worker still sees the replica.
+_primary_pins: Dict[int, float] = {}
+
+def pin_to_primary(user_id: int):
+    now = time.monotonic()
+    if len(_primary_pins) > 10000:
+        for pinned, until in list(_primary_pins.items()):
+            if until < now:
+                del _primary_pins[pinned]
+    _primary_pins[user_id] = now + settings.READ_YOUR_WRITES_SECONDS
+
+def pinned_to_primary(user_id: int) -> bool:
+    until = _primary_pins.get(user_id)
+    return until is not None and until >= time.monotonic()
+
+# get_current_user records the user in session.info["user_id"]
+@event.listens_for(Session, "after_flush")
+def _flushed(session, flush_context):
+    session.info["wrote"] = True
+
+@event.listens_for(Session, "do_orm_execute")
+def _executed(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+@event.listens_for(Session, "after_commit")
+def _pin_writer(session):
+    if session.info.pop("wrote", False) and session.info.get("user_id") is not None:
+        pin_to_primary(session.info["user_id"])
+
+@event.listens_for(Session, "after_rollback")
+def _forget_writes(session):
+    session.info.pop("wrote", None)
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
             yield session
         finally:
             await session.close()
-
@@ -6,8 +6,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import ValidationError
 from app.core import security
 from app.core.config import settings
-from app.core.database import get_db
+from app.core.database import get_db, ReadSessionLocal, read_engine, engine, pinned_to_primary
 from app.models.user import User
+from app.core.user_cache import user_cache
 from sqlalchemy import select
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -29,10 +30,37 @@ async def get_current_user(
             raise credentials_exception
     except (JWTError, ValidationError):
         raise credentials_exception
+
+    # Lets commits of this session pin the user to the primary
+    db.info["user_id"] = int(user_id)
+
+    user = user_cache.get(int(user_id))
+    if user is not None:
+        return user
+    if settings.AUTH_TRUST_TOKEN_CLAIMS and "email" in payload:
+        return User(id=int(user_id), email=payload["email"])
     
     result = await db.execute(select(User).where(User.id == int(user_id)))
     user = result.scalars().first()
     if user is None:
         raise credentials_exception
+    user_cache.put(user)
     return user
 
+async def get_read_db(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Session for read-only handlers.
+
+    Uses the replica unless there is none or the user wrote recently, in
+    which case the request's primary session is shared.
+    """
+    if read_engine is engine or pinned_to_primary(current_user.id):
+        yield db
+        return
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
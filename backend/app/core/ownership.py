@@ -0,0 +1,115 @@
+"""Which dogs a user owns, cached per user.
+
+Almost every route checks that a dog (or a record hanging off a dog)
+belongs to the current user. `owned_dog_ids` answers that from a small
+in-process cache so the check is a set lookup instead of a query or a
+join to `dogs` per request.
+
+Dog inserts, deletes and owner changes made through the ORM invalidate the
+affected users at flush and again after commit. The TTL bounds staleness
+for writes from other processes, e.g. `transfer-dog` run from the CLI, so
+the write checks `require_dog` and `require_dogs` ask the database instead:
+a row stamped with a stale owner would break the `owner_user_id` copies
+on the dog-owned tables.
+"""
+import time
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, Optional
+from fastapi import HTTPException
+from sqlalchemy import event, select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+from app.models.dogs import Dog
+
+class DogOwnershipCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+
+    def get(self, user_id: int) -> Optional[FrozenSet[int]]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, dog_ids = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return dog_ids
+
+    def put(self, user_id: int, dog_ids: FrozenSet[int]):
+        if self._max_entries <= 0 or self._ttl <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self._ttl, dog_ids)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+dog_ownership = DogOwnershipCache(settings.OWNERSHIP_CACHE_SIZE, settings.OWNERSHIP_CACHE_TTL_SECONDS)
+
+async def owned_dog_ids(db: AsyncSession, user_id: int) -> FrozenSet[int]:
+    dog_ids = dog_ownership.get(user_id)
+    if dog_ids is None:
+        result = await db.execute(select(Dog.id).where(Dog.owner_user_id == user_id))
+        dog_ids = frozenset(result.scalars().all())
+        dog_ownership.put(user_id, dog_ids)
+    return dog_ids
+
+def _locked_owned(user_id: int, dog_ids: Iterable[int]):
+    # FOR SHARE holds off transfer_dog, which locks the dog FOR UPDATE
+    # first, until the caller's transaction ends
+    return select(Dog.id).where(Dog.id.in_(dog_ids), Dog.owner_user_id == user_id).with_for_update(read=True)
+
+async def require_dog(db: AsyncSession, user_id: int, dog_id: int):
+    """404 unless the user owns the dog, for writes."""
+    result = await db.execute(_locked_owned(user_id, [dog_id]))
+    if result.first() is None:
+        raise HTTPException(status_code=404, detail="Dog not found or access denied")
+
+async def require_dogs(db: AsyncSession, user_id: int, dog_ids: Iterable[int]):
+    """400 unless the user owns every one of the dogs, for writes."""
+    dog_ids = set(dog_ids)
+    if not dog_ids:
+        return
+    result = await db.execute(_locked_owned(user_id, dog_ids))
+    if len(result.all()) != len(dog_ids):
+        raise HTTPException(status_code=400, detail="One or more dogs not found or access denied")
+
+_PENDING_KEY = "dog_ownership_invalidations"
+
+def _invalidate_later(target, user_ids):
+    session = object_session(target)
+    for user_id in user_ids:
+        if user_id is None:
+            continue
+        dog_ownership.invalidate(user_id)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(user_id)
+
+@event.listens_for(Dog, "after_insert")
+@event.listens_for(Dog, "after_delete")
+def _dog_added_or_removed(mapper, connection, target):
+    _invalidate_later(target, [target.owner_user_id])
+
+@event.listens_for(Dog, "after_update")
+def _dog_updated(mapper, connection, target):
+    history = inspect(target).attrs.owner_user_id.history
+    if history.has_changes():
+        _invalidate_later(target, list(history.deleted) + list(history.added))
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        dog_ownership.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
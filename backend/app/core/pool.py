@@ -0,0 +1,80 @@
+"""Connection pool with checkout telemetry.
+
+`InstrumentedPool` is the regular asyncio queue pool, timing every checkout
+(queueing for a free connection, opening a new one and the pre-ping) into
+a `PoolMetrics`. `snapshot()` combines that with the pool's own counters
+for the internal metrics endpoint.
+"""
+import bisect
+import time
+from typing import Dict, Optional
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds, in seconds, of the checkout wait histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class PoolMetrics:
+    def __init__(self):
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        # One count per bucket plus the overflow (+Inf) bucket
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float):
+        self.checkouts += 1
+        self.wait_sum += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_counts[bisect.bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def histogram(self) -> Dict[str, int]:
+        """Cumulative counts per upper bound, Prometheus style."""
+        buckets, total = {}, 0
+        for bound, count in zip(WAIT_BUCKETS + (float("inf"),), self.wait_counts):
+            total += count
+            buckets["+Inf" if bound == float("inf") else str(bound)] = total
+        return buckets
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    metrics: Optional[PoolMetrics] = None
+
+    def connect(self):
+        metrics = self.metrics
+        if metrics is None:
+            return super().connect()
+        metrics.waiting += 1
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            metrics.timeouts += 1
+            raise
+        finally:
+            metrics.waiting -= 1
+            metrics.observe(time.perf_counter() - started)
+
+    def recreate(self):
+        # Keep the counters across engine.dispose()
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def snapshot(self) -> dict:
+        metrics = self.metrics or PoolMetrics()
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "waiting": metrics.waiting,
+            "checkouts": metrics.checkouts,
+            "timeouts": metrics.timeouts,
+            "wait_seconds": {
+                "sum": round(metrics.wait_sum, 6),
+                "max": round(metrics.wait_max, 6),
+                "buckets": metrics.histogram(),
+            },
+        }
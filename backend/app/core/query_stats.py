@@ -0,0 +1,110 @@
+"""Per-request SQL statistics.
+
+Engine events count every statement and its time into the collectors
+active in the current context. `QueryStatsMiddleware` opens one per HTTP
+request and reports it in the `Server-Timing` and `X-DB-Queries` response
+headers; with DEBUG on it also logs statements repeated more than
+N_PLUS_ONE_THRESHOLD times in one request, the usual sign of an N+1 loop.
+
+`assert_max_queries` opens a collector around any block, e.g. a test
+calling an endpoint, and fails when the block ran more statements.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class QueryStats:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[fingerprint(statement)] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.most_common() if n > threshold]
+
+_collectors: ContextVar[Tuple[QueryStats, ...]] = ContextVar("query_stats_collectors", default=())
+
+_PARAMS = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*|%\(\w+\)s(?:\s*,\s*%\(\w+\)s)*")
+
+def fingerprint(statement: str) -> str:
+    """The statement with parameter lists collapsed, so expanded IN lists
+    of different lengths count as the same statement."""
+    return _PARAMS.sub("?", " ".join(statement.split()))
+
+@contextmanager
+def collect_queries():
+    stats = QueryStats()
+    token = _collectors.set(_collectors.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _collectors.reset(token)
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail when the block runs more than `limit` SQL statements."""
+    with collect_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {n}x {sql}" for sql, n in stats.statements.most_common())
+        raise AssertionError(f"Expected at most {limit} queries, ran {stats.count}:\n{listing}")
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    if _collectors.get():
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _collectors.get()
+    starts = conn.info.get("query_start")
+    if not collectors or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for stats in collectors:
+        stats.record(statement, elapsed)
+
+@event.listens_for(Engine, "handle_error")
+def _failed_execute(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_start"):
+        conn.info["query_start"].pop()
+
+class QueryStatsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with collect_queries() as stats:
+            async def send_with_stats(message: Message):
+                if message["type"] == "http.response.start":
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", f'db;dur={stats.seconds * 1000:.1f};desc="{stats.count} queries"')
+                    headers.append("X-DB-Queries", str(stats.count))
+                await send(message)
+
+            await self.app(scope, receive, send_with_stats)
+
+        if settings.DEBUG:
+            for sql, n in stats.repeated(settings.N_PLUS_ONE_THRESHOLD):
+                logger.warning("Possible N+1: %s %s ran %d times: %s", scope["method"], scope["path"], n, sql[:300])
@@ -0,0 +1,75 @@
+"""In-process cache of authenticated users.
+
+`get_current_user` resolves users through `user_cache` so authenticated
+requests skip the users lookup. Entries expire after USER_CACHE_TTL_SECONDS
+and the least recently used are dropped past USER_CACHE_SIZE.
+
+Changes made through the ORM invalidate the entry at flush and again after
+commit (so a concurrent request cannot re-cache the old row in between).
+Bulk `update(User)` statements bypass this and are only bounded by the TTL,
+as are changes made by other worker processes.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app.core.config import settings
+from app.models.user import User
+
+# Everything but the password hash, which authentication never needs
+CACHED_COLUMNS = [column.key for column in inspect(User).column_attrs if column.key != "password_hash"]
+
+class UserCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._entries: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+        self._ttl = ttl_seconds
+
+    def get(self, user_id: int) -> Optional[User]:
+        """A fresh, detached User built from the cached row."""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, values = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(user_id, None)
+            return None
+        self._entries.move_to_end(user_id)
+        return User(**values)
+
+    def put(self, user: User):
+        if self._max_entries <= 0 or self._ttl <= 0:
+            return
+        values: Dict = {key: getattr(user, key) for key in CACHED_COLUMNS}
+        self._entries[user.id] = (time.monotonic() + self._ttl, values)
+        self._entries.move_to_end(user.id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def clear(self):
+        self._entries.clear()
+
+user_cache = UserCache(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL_SECONDS)
+
+_PENDING_KEY = "user_cache_invalidations"
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target):
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        user_cache.invalidate(user_id)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_pending(session):
+    session.info.pop(_PENDING_KEY, None)
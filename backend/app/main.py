@@ -1,22 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.routers import auth, dogs, health, equipment, care, tags, training, walks, activity, reminders
+from app.core.query_stats import QueryStatsMiddleware
+from app.routers import auth, dogs, health, equipment, care, tags, training, walks, activity, reminders, internal
+from app.services.reminders import reminder_scheduler
+from app.services.static_files import MediaFiles
+from app.services.avatars import start_pool, shutdown_pool
+from app.services.uploads import UploadLimitMiddleware, GPX, AVATAR, INVOICE
 import os
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    reminder_scheduler.start()
+    start_pool()
+    yield
+    await reminder_scheduler.stop()
+    shutdown_pool()
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="API for managing dogs, health, training, and walks.",
     version="0.1.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
 # Ensure media directory exists
-os.makedirs("/app/media", exist_ok=True)
+os.makedirs(settings.MEDIA_ROOT, exist_ok=True)
 
 # Mount static files for media
-app.mount("/media", StaticFiles(directory="/app/media"), name="media")
+app.mount("/media", MediaFiles(directory=settings.MEDIA_ROOT), name="media")
 
 # CORS Configuration
 origins = [
@@ -25,12 +39,21 @@ origins = [
     "http://localhost",
 ]
 
+app.add_middleware(QueryStatsMiddleware)
+
+app.add_middleware(UploadLimitMiddleware, routes=[
+    (rf"{settings.API_V1_STR}/dogs/\d+/avatar", AVATAR),
+    (rf"{settings.API_V1_STR}/walks/\d+/gpx", GPX),
+    (rf"{settings.API_V1_STR}/health/invoices/\d+/file", INVOICE),
+])
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # <--- CHANGE THIS
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "X-DB-Queries"],
 )
 
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
@@ -43,6 +66,7 @@ app.include_router(training.router, prefix=f"{settings.API_V1_STR}/training", ta
 app.include_router(walks.router, prefix=f"{settings.API_V1_STR}/walks", tags=["walks"])
 app.include_router(activity.router, prefix=f"{settings.API_V1_STR}/activity", tags=["activity"])
 app.include_router(reminders.router, prefix=f"{settings.API_V1_STR}/reminders", tags=["reminders"])
+app.include_router(internal.router, prefix="/internal", include_in_schema=False)
 
 @app.get("/")
 async def root():
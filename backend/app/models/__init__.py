@@ -4,6 +4,9 @@ from .dogs import Dog, DogProfileDetails
 from .health import VetVisit, Vaccination, Invoice
 from .care import CareTask, CareTaskLog
 from .training import TrainingGoal, BehaviorIssue, TrainingLog
-from .walks import Walk, WalkDog
+from .walks import Walk, WalkDog, WalkTrack, WalkCell, WalkStatsDaily
 from .equipment import EquipmentItem
 from .tags import Tag, TagAssignment
+from .activity import ActivityEvent
+from .reminders import ReminderEntry, ReminderCacheState
+from .media import MediaBlob
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
+from app.models.base import Base
+
+class ActivityEvent(Base):
+    """Denormalized feed row, kept in sync with its source entity on write.
+
+    `type` + `entity_id` point back at the walk, training log, vet visit or
+    care task log the row was built from.
+    """
+    __tablename__ = "activity_events"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
+    type = Column(String, nullable=False) # WALK, TRAINING, VET, CARE
+    entity_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    description = Column(Text, nullable=True)
+    dog_names = Column(ARRAY(Text), nullable=False, default=list)
+
+    __table_args__ = (
+        UniqueConstraint("type", "entity_id"),
+        Index("ix_activity_events_user_feed", "user_id", occurred_at.desc(), type.desc(), entity_id.desc()),
+    )
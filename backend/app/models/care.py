@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Boolean, Enum
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, ForeignKey, Boolean, Enum, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 import enum
@@ -13,24 +13,36 @@ class CareTask(Base):
     __tablename__ = "care_tasks"
 
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False, index=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=True)
     interval_type = Column(Enum(IntervalType), nullable=False)
     interval_days = Column(Integer, nullable=True)
+    rrule = Column(String, nullable=True) # overrides interval_type, see app.services.recurrence
+    dtstart = Column(Date, nullable=True) # first due date of the rrule series
     next_due_date = Column(Date, nullable=False)
     is_active = Column(Boolean, default=True)
 
     dog = relationship("Dog", back_populates="care_tasks")
     logs = relationship("CareTaskLog", back_populates="task", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        Index("ix_care_tasks_next_due_date_active", next_due_date, postgresql_where=is_active),
+    )
+
 class CareTaskLog(Base):
     __tablename__ = "care_task_logs"
 
     id = Column(Integer, primary_key=True, index=True)
     care_task_id = Column(Integer, ForeignKey("care_tasks.id"), nullable=False)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     done_at = Column(DateTime(timezone=True), nullable=False)
     notes = Column(Text, nullable=True)
 
     task = relationship("CareTask", back_populates="logs")
 
+    __table_args__ = (
+        Index("ix_care_task_logs_task_done", care_task_id, done_at),
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Float, Text, ForeignKey, Enum
+from sqlalchemy import Column, Integer, String, Date, Float, Text, ForeignKey, Enum, JSON
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 import enum
@@ -19,6 +19,7 @@ class Dog(Base):
     sex = Column(Enum(SexEnum), default=SexEnum.UNKNOWN)
     weight_kg = Column(Float, nullable=True)
     avatar_image_url = Column(String, nullable=True)
+    avatar_renditions = Column(JSON, nullable=True) # [{url, width, height, format}], see app.services.avatars
     notes = Column(Text, nullable=True)
     
     # Relationships
@@ -16,7 +16,8 @@ class EquipmentItem(Base):
     __tablename__ = "equipment_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False, index=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     type = Column(Enum(EquipmentType), default=EquipmentType.OTHER)
     name = Column(String, nullable=False)
     description = Column(Text, nullable=True)
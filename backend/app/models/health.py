@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, Numeric
+from sqlalchemy import Column, Integer, String, Date, Text, ForeignKey, Numeric, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
@@ -8,7 +8,8 @@ class VetVisit(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
-    date = Column(Date, nullable=False)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    date = Column(Date, nullable=False, index=True)
     vet_name = Column(String, nullable=True)
     reason = Column(String, nullable=False)
     diagnosis = Column(Text, nullable=True)
@@ -18,24 +19,34 @@ class VetVisit(Base):
     dog = relationship("Dog", back_populates="vet_visits")
     invoices = relationship("Invoice", back_populates="vet_visit")
 
+    __table_args__ = (
+        Index("ix_vet_visits_dog_date", "dog_id", "date"),
+    )
+
 class Vaccination(Base):
     __tablename__ = "vaccinations"
 
     id = Column(Integer, primary_key=True, index=True)
     dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     date = Column(Date, nullable=False)
     vaccine_type = Column(String, nullable=False)
-    valid_until = Column(Date, nullable=True)
+    valid_until = Column(Date, nullable=True, index=True)
     notes = Column(Text, nullable=True)
 
     dog = relationship("Dog", back_populates="vaccinations")
 
+    __table_args__ = (
+        Index("ix_vaccinations_dog_date", "dog_id", "date"),
+    )
+
 class Invoice(Base):
     __tablename__ = "invoices"
 
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=True)
-    vet_visit_id = Column(Integer, ForeignKey("vet_visits.id"), nullable=True)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=True, index=True)
+    vet_visit_id = Column(Integer, ForeignKey("vet_visits.id"), nullable=True, index=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     date = Column(Date, nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
     currency = Column(String, default="CHF")
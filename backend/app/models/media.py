@@ -0,0 +1,11 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from app.models.base import Base
+
+class MediaBlob(Base):
+    """Reference count of a content-addressed file, see app.services.media."""
+    __tablename__ = "media_blobs"
+
+    path = Column(String, primary_key=True) # /media/sha256/ab/cd/<hash>.<ext>
+    size = Column(BigInteger, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
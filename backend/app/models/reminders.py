@@ -0,0 +1,33 @@
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Boolean, Index, UniqueConstraint
+from app.models.base import Base
+
+class ReminderEntry(Base):
+    """Precomputed reminder of one user, see app.services.reminders.
+
+    Entries that drop out of the window are kept as tombstones
+    (`is_deleted`) so clients polling for changes learn about removals.
+    """
+    __tablename__ = "reminder_entries"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    type = Column(String, nullable=False) # CARE_TASK, VACCINATION, VET_VISIT
+    entity_id = Column(Integer, nullable=False)
+    date = Column(Date, nullable=False)
+    title = Column(String, nullable=False)
+    dog_name = Column(String, nullable=False)
+    is_deleted = Column(Boolean, nullable=False, default=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "type", "entity_id"),
+        Index("ix_reminder_entries_user_updated", "user_id", "updated_at"),
+    )
+
+class ReminderCacheState(Base):
+    __tablename__ = "reminder_cache_states"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    computed_on = Column(Date, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+    changed_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 
@@ -15,9 +15,13 @@ class TagAssignment(Base):
     __tablename__ = "tag_assignments"
 
     id = Column(Integer, primary_key=True, index=True)
-    tag_id = Column(Integer, ForeignKey("tags.id"), nullable=False)
+    tag_id = Column(Integer, ForeignKey("tags.id"), nullable=False, index=True)
     entity_type = Column(String, nullable=False) # "TRAINING_LOG", "WALK"
     entity_id = Column(Integer, nullable=False)
 
     tag = relationship("Tag", back_populates="assignments")
 
+    __table_args__ = (
+        Index("ix_tag_assignments_entity", "entity_type", "entity_id"),
+    )
+
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, DateTime, JSON
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Enum, DateTime, JSON, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 import enum
@@ -13,7 +13,8 @@ class TrainingGoal(Base):
     __tablename__ = "training_goals"
 
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False, index=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     category = Column(String, nullable=True)
     status = Column(Enum(GoalStatus), default=GoalStatus.PLANNED)
@@ -27,7 +28,8 @@ class BehaviorIssue(Base):
     __tablename__ = "behavior_issues"
 
     id = Column(Integer, primary_key=True, index=True)
-    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
+    dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False, index=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     title = Column(String, nullable=False)
     description = Column(Text, nullable=False)
     typical_triggers = Column(Text, nullable=True)
@@ -41,8 +43,9 @@ class TrainingLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     dog_id = Column(Integer, ForeignKey("dogs.id"), nullable=False)
-    training_goal_id = Column(Integer, ForeignKey("training_goals.id"), nullable=True)
-    behavior_issue_id = Column(Integer, ForeignKey("behavior_issues.id"), nullable=True)
+    owner_user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    training_goal_id = Column(Integer, ForeignKey("training_goals.id"), nullable=True, index=True)
+    behavior_issue_id = Column(Integer, ForeignKey("behavior_issues.id"), nullable=True, index=True)
     datetime = Column(DateTime(timezone=True), nullable=False)
     rating = Column(Integer, nullable=True) # 1-5
     notes_markdown = Column(Text, nullable=True)
@@ -52,3 +55,7 @@ class TrainingLog(Base):
     goal = relationship("TrainingGoal", back_populates="logs")
     behavior_issue = relationship("BehaviorIssue", back_populates="logs")
 
+    __table_args__ = (
+        Index("ix_training_logs_dog_datetime", dog_id, datetime),
+    )
+
@@ -1,5 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Enum, DateTime, JSON, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, ForeignKey, Enum, DateTime, Date, JSON, Boolean, LargeBinary, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from app.models.base import Base
 import enum
 
@@ -21,9 +22,23 @@ class Walk(Base):
     video_urls_json = Column(JSON, default=list)
     gpx_file_url = Column(String, nullable=True)
     has_route_data = Column(Boolean, default=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    # Derived from the uploaded GPX track
+    track_duration_seconds = Column(Integer, nullable=True)
+    elevation_gain_m = Column(Float, nullable=True)
+    min_lat = Column(Float, nullable=True)
+    min_lon = Column(Float, nullable=True)
+    max_lat = Column(Float, nullable=True)
+    max_lon = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index("ix_walks_user_bbox", "user_id", "min_lat", "max_lat", "min_lon", "max_lon"),
+    )
 
     # Relationships
     dog_associations = relationship("WalkDog", back_populates="walk", cascade="all, delete-orphan")
+    track = relationship("WalkTrack", uselist=False, back_populates="walk", cascade="all, delete-orphan")
 
 class WalkDog(Base):
     __tablename__ = "walk_dogs"
@@ -34,3 +49,43 @@ class WalkDog(Base):
     walk = relationship("Walk", back_populates="dog_associations")
     dog = relationship("Dog", back_populates="walk_associations")
 
+    __table_args__ = (
+        Index("ix_walk_dogs_dog_walk", "dog_id", "walk_id"),
+    )
+
+
+class WalkTrack(Base):
+    """Parsed GPX points of a walk as an .npy blob, see app.services.gpx."""
+    __tablename__ = "walk_tracks"
+
+    walk_id = Column(Integer, ForeignKey("walks.id"), primary_key=True)
+    point_count = Column(Integer, nullable=False)
+    data = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+
+    walk = relationship("Walk", back_populates="track")
+
+
+class WalkCell(Base):
+    """Grid cells a walk's track passes through, see app.services.spatial."""
+    __tablename__ = "walk_cells"
+
+    walk_id = Column(Integer, ForeignKey("walks.id"), primary_key=True)
+    cell_x = Column(Integer, primary_key=True)
+    cell_y = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+
+    __table_args__ = (
+        Index("ix_walk_cells_user_cell", "user_id", "cell_y", "cell_x"),
+    )
+
+
+class WalkStatsDaily(Base):
+    """Walk totals per dog and UTC day, see app.services.walk_stats."""
+    __tablename__ = "walk_stats_daily"
+
+    dog_id = Column(Integer, ForeignKey("dogs.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    walk_count = Column(Integer, nullable=False)
+    total_minutes = Column(Integer, nullable=False)
+    total_distance_km = Column(Float, nullable=False)
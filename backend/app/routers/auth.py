@@ -26,7 +26,7 @@ async def register(
     
     user = User(
         email=user_in.email,
-        password_hash=security.get_password_hash(user_in.password)
+        password_hash=await security.get_password_hash_async(user_in.password)
     )
     db.add(user)
     await db.commit()
@@ -40,14 +40,21 @@ async def login(
 ):
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalars().first()
-    if not user or not security.verify_password(form_data.password, user.password_hash):
+    valid, new_hash = (False, None)
+    if user:
+        valid, new_hash = await security.verify_password_async(form_data.password, user.password_hash)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Stored hash predates the current BCRYPT_ROUNDS
+        user.password_hash = new_hash
+        await db.commit()
     
-    access_token = security.create_access_token(subject=user.id)
+    access_token = security.create_access_token(subject=user.id, email=user.email)
     refresh_token = security.create_refresh_token(subject=user.id)
     
     return {
@@ -80,7 +87,7 @@ async def refresh_token(
     if not user:
         raise credentials_exception
         
-    access_token = security.create_access_token(subject=user.id)
+    access_token = security.create_access_token(subject=user.id, email=user.email)
     new_refresh_token = security.create_refresh_token(subject=user.id)
     
     return {
@@ -1,29 +1,54 @@
-from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Annotated, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from sqlalchemy import select, insert
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.core.ownership import require_dog
 from app.models.user import User
-from app.models.dogs import Dog
-from app.models.care import CareTask, CareTaskLog, IntervalType
+from app.models.care import CareTask, CareTaskLog
 from app.schemas.care import (
     CareTaskCreate, CareTaskUpdate, CareTaskResponse,
-    CareTaskLogResponse
+    CareTaskLogResponse, CareOccurrence, CareTaskBatchComplete
 )
-from datetime import datetime, timedelta
+from app.services.activity import sync_activity, CARE
+from app.services.reminders import reminder_scheduler
+from app.services.recurrence import parse_rrule, task_occurrences, next_due_date
+from datetime import date, datetime, timedelta
 
 router = APIRouter()
 
+# Longest range /occurrences expands in one call
+MAX_OCCURRENCE_RANGE = timedelta(days=366)
+MAX_BATCH_COMPLETIONS = 200
+
+def care_tasks_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(CareTask).where(CareTask.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(CareTask.dog_id == dog_id)
+    return query
+
+def care_logs_query(user_id: int, dog_id: Optional[int] = None, task_id: Optional[int] = None):
+    query = select(CareTaskLog).where(CareTaskLog.owner_user_id == user_id)
+    if dog_id:
+        query = query.join(CareTask).where(CareTask.dog_id == dog_id)
+    if task_id:
+        query = query.where(CareTaskLog.care_task_id == task_id)
+    return query
+
+def validate_rrule(rrule: Optional[str]):
+    if rrule:
+        try:
+            parse_rrule(rrule)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid recurrence rule: {e}")
+
 @router.get("/tasks", response_model=List[CareTaskResponse])
 async def read_care_tasks(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: int = None
 ):
-    query = select(CareTask).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(CareTask.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(care_tasks_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/tasks", response_model=CareTaskResponse)
@@ -32,14 +57,15 @@ async def create_care_task(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    # Verify dog
-    dog_result = await db.execute(select(Dog).where(Dog.id == task_in.dog_id, Dog.owner_user_id == current_user.id))
-    if not dog_result.scalars().first():
-        raise HTTPException(status_code=404, detail="Dog not found")
+    await require_dog(db, current_user.id, task_in.dog_id)
+    validate_rrule(task_in.rrule)
         
-    task = CareTask(**task_in.model_dump())
+    task = CareTask(**task_in.model_dump(), owner_user_id=current_user.id)
+    if task.rrule:
+        task.dtstart = task.next_due_date
     db.add(task)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(task)
     return task
 
@@ -50,16 +76,24 @@ async def update_care_task(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(CareTask).join(Dog).where(CareTask.id == task_id, Dog.owner_user_id == current_user.id))
-    task = result.scalars().first()
-    if not task:
+    task = await db.get(CareTask, task_id)
+    if not task or task.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Care task not found")
+    validate_rrule(task_in.rrule)
         
     update_data = task_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(task, key, value)
+    # A new rule or due date starts a new series
+    if "rrule" in update_data or "next_due_date" in update_data:
+        task.dtstart = task.next_due_date if task.rrule else None
         
+    # Log titles in the activity feed are derived from the task title
+    await db.flush()
+    log_ids = await db.execute(select(CareTaskLog.id).where(CareTaskLog.care_task_id == task.id))
+    await sync_activity(db, CARE, log_ids.scalars().all())
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(task)
     return task
 
@@ -69,13 +103,17 @@ async def delete_care_task(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(CareTask).join(Dog).where(CareTask.id == task_id, Dog.owner_user_id == current_user.id))
-    task = result.scalars().first()
-    if not task:
+    task = await db.get(CareTask, task_id)
+    if not task or task.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Care task not found")
         
+    log_ids = await db.execute(select(CareTaskLog.id).where(CareTaskLog.care_task_id == task.id))
+    log_ids = log_ids.scalars().all()
     await db.delete(task)
+    await db.flush()
+    await sync_activity(db, CARE, log_ids)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     return {"ok": True}
 
 @router.post("/tasks/{task_id}/complete", response_model=CareTaskResponse)
@@ -85,61 +123,130 @@ async def complete_care_task(
     db: Annotated[AsyncSession, Depends(get_db)],
     notes: str = None
 ):
-    result = await db.execute(select(CareTask).join(Dog).where(CareTask.id == task_id, Dog.owner_user_id == current_user.id))
-    task = result.scalars().first()
-    if not task:
+    # Locked so a dog transfer cannot move the task before the log is written
+    task = await db.get(CareTask, task_id, with_for_update=True)
+    if not task or task.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Care task not found")
     
     # Create log
     log = CareTaskLog(
         care_task_id=task.id,
+        owner_user_id=current_user.id,
         done_at=datetime.utcnow(),
         notes=notes
     )
     db.add(log)
     
-    # Calculate next due date
-    today = datetime.utcnow().date()
-    if task.interval_type == IntervalType.DAILY:
-        task.next_due_date = today + timedelta(days=1)
-    elif task.interval_type == IntervalType.WEEKLY:
-        task.next_due_date = today + timedelta(weeks=1)
-    elif task.interval_type == IntervalType.MONTHLY:
-        # Simple monthly addition (30 days approx or same day next month)
-        # Let's do 30 days for simplicity or simple month logic
-        import calendar
-        month = today.month
-        year = today.year
-        next_month = month + 1
-        if next_month > 12:
-            next_month = 1
-            year += 1
-        
-        # Try to keep same day, clamp to max days in month
-        day = min(today.day, calendar.monthrange(year, next_month)[1])
-        task.next_due_date = today.replace(year=year, month=next_month, day=day)
-        
-    elif task.interval_type == IntervalType.CUSTOM_DAYS:
-        days = task.interval_days or 1
-        task.next_due_date = today + timedelta(days=days)
+    # Calculate next due date, a rule without further occurrences retires the task
+    next_due = next_due_date(task, datetime.utcnow().date())
+    if next_due is None:
+        task.is_active = False
+    else:
+        task.next_due_date = next_due
     
+    await db.flush()
+    await sync_activity(db, CARE, [log.id])
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(task)
     return task
 
+@router.post("/tasks/complete-batch", response_model=List[CareTaskResponse])
+async def complete_care_tasks(
+    batch_in: CareTaskBatchComplete,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Complete many care tasks at once, e.g. a whole morning routine."""
+    if not batch_in.items:
+        return []
+    if len(batch_in.items) > MAX_BATCH_COMPLETIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_COMPLETIONS} completions per batch")
+
+    task_ids = {item.task_id for item in batch_in.items}
+    result = await db.execute(select(CareTask).where(
+        CareTask.id.in_(task_ids), CareTask.owner_user_id == current_user.id
+    ).with_for_update())
+    tasks = {task.id: task for task in result.scalars().all()}
+    if len(tasks) != len(task_ids):
+        raise HTTPException(status_code=404, detail="Care task not found")
+
+    now = datetime.utcnow()
+    logs = [
+        dict(care_task_id=item.task_id, owner_user_id=current_user.id, done_at=item.done_at or now, notes=item.notes)
+        for item in batch_in.items
+    ]
+    log_ids = await db.execute(insert(CareTaskLog).values(logs).returning(CareTaskLog.id))
+    log_ids = log_ids.scalars().all()
+
+    # A task completed several times in the batch moves on from its latest completion
+    completed_on = {}
+    for log in logs:
+        day = log["done_at"].date()
+        completed_on[log["care_task_id"]] = max(day, completed_on.get(log["care_task_id"], day))
+    for task_id, day in completed_on.items():
+        task = tasks[task_id]
+        next_due = next_due_date(task, day)
+        if next_due is None:
+            task.is_active = False
+        else:
+            task.next_due_date = next_due
+
+    await db.flush()
+    await sync_activity(db, CARE, log_ids)
+    await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
+    return [tasks[item_id] for item_id in dict.fromkeys(item.task_id for item in batch_in.items)]
+
+@router.get("/occurrences", response_model=List[CareOccurrence])
+async def read_care_occurrences(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    start: Annotated[date, Query(alias="from")],
+    end: Annotated[date, Query(alias="to")],
+    dog_id: int = None
+):
+    """Projected due dates of all active care tasks within [from, to]."""
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if end - start > MAX_OCCURRENCE_RANGE:
+        raise HTTPException(status_code=400, detail="Range too large")
+
+    # Tasks first due after the range cannot occur in it
+    query = select(CareTask).where(
+        CareTask.owner_user_id == current_user.id,
+        CareTask.is_active == True,
+        CareTask.next_due_date <= end
+    )
+    if dog_id:
+        query = query.where(CareTask.dog_id == dog_id)
+    result = await db.execute(query)
+
+    today = date.today()
+    items = []
+    for task in result.scalars().all():
+        try:
+            days = list(task_occurrences(task, start, end))
+        except ValueError:
+            continue
+        for day in days:
+            items.append(CareOccurrence(
+                task_id=task.id,
+                dog_id=task.dog_id,
+                title=task.title,
+                date=day,
+                is_overdue=(day < today)
+            ))
+    items.sort(key=lambda item: (item.date, item.task_id))
+    return items
+
 @router.get("/logs", response_model=List[CareTaskLogResponse])
 async def read_care_logs(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: int = None,
     task_id: int = None
 ):
-    query = select(CareTaskLog).join(CareTask).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(CareTask.dog_id == dog_id)
-    if task_id:
-        query = query.where(CareTaskLog.care_task_id == task_id)
-        
-    result = await db.execute(query)
+    result = await db.execute(care_logs_query(current_user.id, dog_id, task_id))
     return result.scalars().all()
 
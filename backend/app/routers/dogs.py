@@ -1,22 +1,25 @@
 from typing import Annotated, List
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, get_read_db
 from app.models.user import User
 from app.models.dogs import Dog, DogProfileDetails
 from app.schemas.dogs import DogCreate, DogUpdate, DogResponse, DogProfileDetailsCreate, DogProfileDetailsResponse
-import shutil
-import os
-from pathlib import Path
 from sqlalchemy.orm import selectinload
+from app.services.activity import dog_activity_ids, sync_dog_activity
+from app.services.reminders import reminder_scheduler
+from app.services.walk_stats import delete_dog_walk_stats
+from app.services.uploads import AVATAR
+from app.services.media import stage_upload, publish_upload, discard_upload, replace_media, release_media
+from app.services.avatars import INVALID_IMAGE_ERRORS, create_renditions, replace_renditions
 
 router = APIRouter()
 
 @router.get("/", response_model=List[DogResponse])
 async def read_dogs(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     skip: int = 0,
     limit: int = 100
 ):
@@ -89,7 +92,12 @@ async def update_dog(
     for key, value in update_data.items():
         setattr(dog, key, value)
     
+    if "name" in update_data:
+        await db.flush()
+        await sync_dog_activity(db, await dog_activity_ids(db, dog.id))
     await db.commit()
+    if "name" in update_data:
+        reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(dog)
     
     # Reload to be safe with async attributes
@@ -112,8 +120,16 @@ async def delete_dog(
     if not dog:
         raise HTTPException(status_code=404, detail="Dog not found")
     
+    # Cascaded records drop out of the feed, shared walks lose the dog name
+    activity_ids = await dog_activity_ids(db, dog.id)
+    await delete_dog_walk_stats(db, dog.id)
+    await release_media(db, dog.avatar_image_url)
+    await replace_renditions(db, dog.avatar_renditions, None)
     await db.delete(dog)
+    await db.flush()
+    await sync_dog_activity(db, activity_ids)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     return {"ok": True}
 
 # Profile Details
@@ -188,23 +204,20 @@ async def upload_avatar(
     if file.content_type not in ["image/jpeg", "image/png"]:
         raise HTTPException(status_code=400, detail="Invalid file type")
     
-    # Save file
-    upload_dir = Path("/app/media/dogs/avatars")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
+    # Save file, with resized renditions for thumbnails
     file_ext = ".jpg" if file.content_type == "image/jpeg" else ".png"
-    filename = f"{dog.id}_{int(os.path.getmtime(upload_dir) if upload_dir.exists() else 0)}{file_ext}" # Simple unique name
-    # Better unique name
-    import time
-    filename = f"{dog.id}_{int(time.time())}{file_ext}"
-    file_path = upload_dir / filename
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    staged = await stage_upload(file, AVATAR)
+    try:
+        renditions = await create_renditions(str(staged.path))
+    except INVALID_IMAGE_ERRORS:
+        await discard_upload(staged)
+        raise HTTPException(status_code=400, detail="Invalid image")
+    media = await publish_upload(staged, file_ext)
         
-    # Update URL
-    # Assuming we serve media at /media
-    dog.avatar_image_url = f"/media/dogs/avatars/{filename}"
+    await replace_media(db, dog.avatar_image_url, media.url, media.size)
+    await replace_renditions(db, dog.avatar_renditions, renditions)
+    dog.avatar_image_url = media.url
+    dog.avatar_renditions = renditions
     await db.commit()
     await db.refresh(dog)
     return dog
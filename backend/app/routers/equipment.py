@@ -1,25 +1,28 @@
-from typing import Annotated, List
+from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.core.ownership import require_dog
 from app.models.user import User
-from app.models.dogs import Dog
 from app.models.equipment import EquipmentItem
 from app.schemas.equipment import EquipmentCreate, EquipmentUpdate, EquipmentResponse
 
 router = APIRouter()
 
+def equipment_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(EquipmentItem).where(EquipmentItem.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(EquipmentItem.dog_id == dog_id)
+    return query
+
 @router.get("/", response_model=List[EquipmentResponse])
 async def read_equipment(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: int = None
 ):
-    query = select(EquipmentItem).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(EquipmentItem.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(equipment_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/", response_model=EquipmentResponse)
@@ -28,12 +31,9 @@ async def create_equipment(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    # Verify dog
-    dog_result = await db.execute(select(Dog).where(Dog.id == item_in.dog_id, Dog.owner_user_id == current_user.id))
-    if not dog_result.scalars().first():
-        raise HTTPException(status_code=404, detail="Dog not found")
+    await require_dog(db, current_user.id, item_in.dog_id)
         
-    item = EquipmentItem(**item_in.model_dump())
+    item = EquipmentItem(**item_in.model_dump(), owner_user_id=current_user.id)
     db.add(item)
     await db.commit()
     await db.refresh(item)
@@ -46,9 +46,8 @@ async def update_equipment(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(EquipmentItem).join(Dog).where(EquipmentItem.id == item_id, Dog.owner_user_id == current_user.id))
-    item = result.scalars().first()
-    if not item:
+    item = await db.get(EquipmentItem, item_id)
+    if not item or item.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Equipment not found")
         
     update_data = item_in.model_dump(exclude_unset=True)
@@ -65,9 +64,8 @@ async def delete_equipment(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(EquipmentItem).join(Dog).where(EquipmentItem.id == item_id, Dog.owner_user_id == current_user.id))
-    item = result.scalars().first()
-    if not item:
+    item = await db.get(EquipmentItem, item_id)
+    if not item or item.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Equipment not found")
         
     await db.delete(item)
@@ -1,40 +1,51 @@
 from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.core.ownership import require_dog
 from app.models.user import User
-from app.models.dogs import Dog
 from app.models.health import VetVisit, Vaccination, Invoice
 from app.schemas.health import (
     VetVisitCreate, VetVisitUpdate, VetVisitResponse,
     VaccinationCreate, VaccinationUpdate, VaccinationResponse,
     InvoiceCreate, InvoiceResponse
 )
-import shutil
-import os
-from pathlib import Path
-import time
+from app.services.activity import sync_activity, VET
+from app.services.reminders import reminder_scheduler
+from app.services.uploads import INVOICE
+from app.services.media import store_upload, replace_media
 
 router = APIRouter()
 
-# Helpers
-async def check_dog_permission(db: AsyncSession, dog_id: int, user_id: int):
-    result = await db.execute(select(Dog).where(Dog.id == dog_id, Dog.owner_user_id == user_id))
-    if not result.scalars().first():
-        raise HTTPException(status_code=404, detail="Dog not found or access denied")
+def vet_visits_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(VetVisit).where(VetVisit.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(VetVisit.dog_id == dog_id)
+    return query
+
+def vaccinations_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(Vaccination).where(Vaccination.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(Vaccination.dog_id == dog_id)
+    return query
+
+def invoices_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(Invoice).where(Invoice.owner_user_id == user_id)
+    if dog_id:
+        # Linked to the dog directly or through one of its vet visits
+        visit_ids = select(VetVisit.id).where(VetVisit.dog_id == dog_id)
+        query = query.where((Invoice.dog_id == dog_id) | Invoice.vet_visit_id.in_(visit_ids))
+    return query
 
 # VET VISITS
 @router.get("/vet-visits", response_model=List[VetVisitResponse])
 async def read_vet_visits(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(VetVisit).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(VetVisit.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(vet_visits_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/vet-visits", response_model=VetVisitResponse)
@@ -43,10 +54,13 @@ async def create_vet_visit(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    await check_dog_permission(db, visit_in.dog_id, current_user.id)
-    visit = VetVisit(**visit_in.model_dump())
+    await require_dog(db, current_user.id, visit_in.dog_id)
+    visit = VetVisit(**visit_in.model_dump(), owner_user_id=current_user.id)
     db.add(visit)
+    await db.flush()
+    await sync_activity(db, VET, [visit.id])
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(visit)
     return visit
 
@@ -57,15 +71,17 @@ async def update_vet_visit(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(VetVisit).join(Dog).where(VetVisit.id == visit_id, Dog.owner_user_id == current_user.id))
-    visit = result.scalars().first()
-    if not visit:
+    visit = await db.get(VetVisit, visit_id)
+    if not visit or visit.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Vet visit not found")
     
     update_data = visit_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(visit, key, value)
+    await db.flush()
+    await sync_activity(db, VET, [visit.id])
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(visit)
     return visit
 
@@ -75,25 +91,24 @@ async def delete_vet_visit(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(VetVisit).join(Dog).where(VetVisit.id == visit_id, Dog.owner_user_id == current_user.id))
-    visit = result.scalars().first()
-    if not visit:
+    visit = await db.get(VetVisit, visit_id)
+    if not visit or visit.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Vet visit not found")
     await db.delete(visit)
+    await db.flush()
+    await sync_activity(db, VET, [visit_id])
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     return {"ok": True}
 
 # VACCINATIONS
 @router.get("/vaccinations", response_model=List[VaccinationResponse])
 async def read_vaccinations(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(Vaccination).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(Vaccination.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(vaccinations_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/vaccinations", response_model=VaccinationResponse)
@@ -102,10 +117,11 @@ async def create_vaccination(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    await check_dog_permission(db, vax_in.dog_id, current_user.id)
-    vax = Vaccination(**vax_in.model_dump())
+    await require_dog(db, current_user.id, vax_in.dog_id)
+    vax = Vaccination(**vax_in.model_dump(), owner_user_id=current_user.id)
     db.add(vax)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(vax)
     return vax
 
@@ -116,15 +132,15 @@ async def update_vaccination(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(Vaccination).join(Dog).where(Vaccination.id == vax_id, Dog.owner_user_id == current_user.id))
-    vax = result.scalars().first()
-    if not vax:
+    vax = await db.get(Vaccination, vax_id)
+    if not vax or vax.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Vaccination not found")
         
     update_data = vax_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(vax, key, value)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     await db.refresh(vax)
     return vax
 
@@ -134,60 +150,22 @@ async def delete_vaccination(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(Vaccination).join(Dog).where(Vaccination.id == vax_id, Dog.owner_user_id == current_user.id))
-    vax = result.scalars().first()
-    if not vax:
+    vax = await db.get(Vaccination, vax_id)
+    if not vax or vax.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Vaccination not found")
     await db.delete(vax)
     await db.commit()
+    reminder_scheduler.mark_dirty(current_user.id)
     return {"ok": True}
 
 # INVOICES
 @router.get("/invoices", response_model=List[InvoiceResponse])
 async def read_invoices(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    # Since invoices can be linked to Dog directly OR via VetVisit, filtering is tricky if done purely on Dog ID.
-    # But typically they are linked to Dog. If only linked to VetVisit, we need to join VetVisit -> Dog.
-    # For simplicity, we assume if dog_id is provided on Invoice, we use it.
-    # But better: Join both ways.
-    
-    query = select(Invoice)
-    # We must filter by user ownership. This requires joins since Invoice doesn't have user_id.
-    # Join Invoice -> Dog (optional)
-    # Join Invoice -> VetVisit (optional) -> Dog
-    
-    # This is complex in SQL. Let's handle "Direct Dog" and "Via VetVisit" separately or assume strict linking.
-    # Schema says: dog_id (FK -> dogs.id, optional), vet_visit_id (FK -> vet_visits.id, optional)
-    # One of them should be set.
-    
-    # Safe way: Fetch all user dogs, then fetch invoices where dog_id IN user_dogs OR vet_visit.dog_id IN user_dogs.
-    
-    user_dogs_result = await db.execute(select(Dog.id).where(Dog.owner_user_id == current_user.id))
-    user_dog_ids = user_dogs_result.scalars().all()
-    
-    if not user_dog_ids:
-        return []
-        
-    # If filtering by specific dog
-    if dog_id:
-        if dog_id not in user_dog_ids:
-             raise HTTPException(status_code=404, detail="Dog not found")
-        target_dog_ids = [dog_id]
-    else:
-        target_dog_ids = user_dog_ids
-
-    # Construct query
-    # Invoices where dog_id IN target OR (vet_visit.dog_id IN target)
-    
-    # We can do this with a JOIN to VetVisit (outer)
-    query = select(Invoice).outerjoin(VetVisit, Invoice.vet_visit_id == VetVisit.id).where(
-        ((Invoice.dog_id.in_(target_dog_ids)) | (VetVisit.dog_id.in_(target_dog_ids)))
-    )
-    
-    result = await db.execute(query)
+    result = await db.execute(invoices_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/invoices", response_model=InvoiceResponse)
@@ -198,18 +176,19 @@ async def create_invoice(
 ):
     # Validate permissions
     if inv_in.dog_id:
-        await check_dog_permission(db, inv_in.dog_id, current_user.id)
+        await require_dog(db, current_user.id, inv_in.dog_id)
     
     if inv_in.vet_visit_id:
         # Check vet visit ownership
-        vv_result = await db.execute(select(VetVisit).join(Dog).where(VetVisit.id == inv_in.vet_visit_id, Dog.owner_user_id == current_user.id))
-        if not vv_result.scalars().first():
+        # Locked like the dog in require_dog, see app.core.ownership
+        visit = await db.get(VetVisit, inv_in.vet_visit_id, with_for_update=True)
+        if not visit or visit.owner_user_id != current_user.id:
              raise HTTPException(status_code=404, detail="Vet visit not found or access denied")
              
     if not inv_in.dog_id and not inv_in.vet_visit_id:
         raise HTTPException(status_code=400, detail="Invoice must be linked to a dog or a vet visit")
 
-    inv = Invoice(**inv_in.model_dump())
+    inv = Invoice(**inv_in.model_dump(), owner_user_id=current_user.id)
     db.add(inv)
     await db.commit()
     await db.refresh(inv)
@@ -222,49 +201,25 @@ async def upload_invoice_file(
     db: Annotated[AsyncSession, Depends(get_db)],
     file: UploadFile = File(...)
 ):
-    # Check invoice ownership
-    # This is tricky because we need to verify the invoice belongs to one of the user's dogs.
-    # Fetch invoice first
     result = await db.execute(select(Invoice).where(Invoice.id == invoice_id))
     invoice = result.scalars().first()
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
-        
-    # Verify ownership
-    user_dogs_result = await db.execute(select(Dog.id).where(Dog.owner_user_id == current_user.id))
-    user_dog_ids = user_dogs_result.scalars().all()
-    
-    has_access = False
-    if invoice.dog_id and invoice.dog_id in user_dog_ids:
-        has_access = True
-    elif invoice.vet_visit_id:
-        # Check via vet visit
-        vv_result = await db.execute(select(VetVisit).where(VetVisit.id == invoice.vet_visit_id))
-        vv = vv_result.scalars().first()
-        if vv and vv.dog_id in user_dog_ids:
-            has_access = True
-            
-    if not has_access:
+    if invoice.owner_user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Access denied")
 
     # Validate file
     if file.content_type not in ["image/jpeg", "image/png", "application/pdf"]:
         raise HTTPException(status_code=400, detail="Invalid file type")
 
-    upload_dir = Path("/app/media/invoices")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
     ext = ".pdf"
     if file.content_type == "image/jpeg": ext = ".jpg"
     elif file.content_type == "image/png": ext = ".png"
     
-    filename = f"{invoice_id}_{int(time.time())}{ext}"
-    file_path = upload_dir / filename
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    media = await store_upload(file, INVOICE, ext)
         
-    invoice.file_url = f"/media/invoices/{filename}"
+    await replace_media(db, invoice.file_url, media.url, media.size)
+    invoice.file_url = media.url
     await db.commit()
     await db.refresh(invoice)
     return invoice
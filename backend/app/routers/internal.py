@@ -0,0 +1,23 @@
+import secrets
+from typing import Annotated, Optional
+from fastapi import APIRouter, Header, HTTPException
+from app.core.config import settings
+from app.core.database import engine, read_engine
+
+router = APIRouter()
+
+def check_metrics_token(authorization: Optional[str]):
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token, settings.METRICS_TOKEN):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+
+@router.get("/metrics")
+async def read_metrics(authorization: Annotated[Optional[str], Header()] = None):
+    """Connection pool state and checkout wait times of this worker."""
+    check_metrics_token(authorization)
+    metrics = {"db_pool": engine.pool.snapshot()}
+    if read_engine is not engine:
+        metrics["db_read_pool"] = read_engine.pool.snapshot()
+    return metrics
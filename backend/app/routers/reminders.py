@@ -1,14 +1,17 @@
 from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, asc
+from sqlalchemy import select
+from app.core.config import settings
 from app.core.deps import get_current_user, get_db
 from app.models.user import User
-from app.models.dogs import Dog
-from app.models.care import CareTask
-from app.models.health import Vaccination, VetVisit
+from app.models.reminders import ReminderEntry
+from app.services.reminders import reminder_query, reminder_scheduler
+from app.services.calendar import build_calendar, calendar_feed_cache
 from pydantic import BaseModel
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import secrets
 
 router = APIRouter()
 
@@ -20,83 +23,155 @@ class ReminderItem(BaseModel):
     dog_name: str
     is_overdue: bool = False
 
+class ReminderChange(ReminderItem):
+    deleted: bool = False
+
+class ReminderChanges(BaseModel):
+    as_of: datetime
+    reset: bool = False # True when `changes` is the full list and replaces the client state
+    changes: List[ReminderChange]
+
+class CalendarFeedToken(BaseModel):
+    token: str
+    url: str
+
 @router.get("/upcoming", response_model=List[ReminderItem])
 async def read_upcoming_reminders(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)],
     days: int = 30
 ):
+    # Care tasks and vaccinations include overdue entries, vet visits only future ones
     today = date.today()
     limit_date = today + timedelta(days=days)
-    
-    reminders = []
-    
-    # Care Tasks (Due <= limit_date)
-    # Also include overdue (due < today)
-    tasks_query = select(CareTask).join(Dog).where(
-        Dog.owner_user_id == current_user.id,
-        CareTask.is_active == True,
-        CareTask.next_due_date <= limit_date
-    )
-    tasks_res = await db.execute(tasks_query)
-    tasks = tasks_res.scalars().all()
-    
-    for t in tasks:
-        d_res = await db.execute(select(Dog.name).where(Dog.id == t.dog_id))
-        d_name = d_res.scalar_one()
-        reminders.append(ReminderItem(
-            type="CARE_TASK",
-            id=t.id,
-            date=t.next_due_date,
-            title=f"Care: {t.title}",
-            dog_name=d_name,
-            is_overdue=(t.next_due_date < today)
-        ))
-
-    # Vaccinations (Valid until <= limit_date)
-    vax_query = select(Vaccination).join(Dog).where(
-        Dog.owner_user_id == current_user.id,
-        Vaccination.valid_until != None,
-        Vaccination.valid_until <= limit_date,
-        Vaccination.valid_until >= today - timedelta(days=365) # Don't show ancient expired ones
+
+    if days > settings.REMINDER_HORIZON_DAYS:
+        # Beyond the precomputed window, compute on the fly
+        result = await db.execute(reminder_query(current_user.id, today, limit_date))
+        rows = [(row.type, row.id, row.date, row.title, row.dog_name) for row in result]
+    else:
+        await reminder_scheduler.ensure_fresh(db, current_user.id)
+        result = await db.execute(
+            select(ReminderEntry)
+            .where(
+                ReminderEntry.user_id == current_user.id,
+                ReminderEntry.is_deleted == False,
+                ReminderEntry.date <= limit_date
+            )
+            .order_by(ReminderEntry.date, ReminderEntry.type, ReminderEntry.entity_id)
+        )
+        rows = [(e.type, e.entity_id, e.date, e.title, e.dog_name) for e in result.scalars().all()]
+
+    return [
+        ReminderItem(
+            type=type_,
+            id=id_,
+            date=day,
+            title=title,
+            dog_name=dog_name,
+            is_overdue=(day < today)
+        )
+        for type_, id_, day, title, dog_name in rows
+    ]
+
+@router.get("/changes", response_model=ReminderChanges)
+async def read_reminder_changes(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    since: Optional[datetime] = None
+):
+    """Reminders added, changed or removed after `since`.
+
+    Pass the returned `as_of` as the next `since`. Without `since`, or when it
+    is older than the tombstone retention, the full window is returned with
+    `reset` set.
+    """
+    today = date.today()
+    state = await reminder_scheduler.ensure_fresh(db, current_user.id)
+
+    if since is not None and since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    retention = datetime.now(timezone.utc) - timedelta(days=settings.REMINDER_TOMBSTONE_DAYS)
+    reset = since is None or since < retention
+
+    query = select(ReminderEntry).where(ReminderEntry.user_id == current_user.id)
+    if reset:
+        query = query.where(ReminderEntry.is_deleted == False)
+    else:
+        query = query.where(ReminderEntry.updated_at > since)
+    result = await db.execute(query.order_by(ReminderEntry.date, ReminderEntry.type, ReminderEntry.entity_id))
+
+    return ReminderChanges(
+        as_of=state.changed_at,
+        reset=reset,
+        changes=[
+            ReminderChange(
+                type=e.type,
+                id=e.entity_id,
+                date=e.date,
+                title=e.title,
+                dog_name=e.dog_name,
+                is_overdue=(e.date < today),
+                deleted=e.is_deleted
+            )
+            for e in result.scalars().all()
+        ]
     )
-    vax_res = await db.execute(vax_query)
-    vaxs = vax_res.scalars().all()
-    
-    for v in vaxs:
-        d_res = await db.execute(select(Dog.name).where(Dog.id == v.dog_id))
-        d_name = d_res.scalar_one()
-        reminders.append(ReminderItem(
-            type="VACCINATION",
-            id=v.id,
-            date=v.valid_until,
-            title=f"Vaccine Expiring: {v.vaccine_type}",
-            dog_name=d_name,
-            is_overdue=(v.valid_until < today)
-        ))
-        
-    # Vet Visits (Date >= today and <= limit_date) - Future visits
-    vet_query = select(VetVisit).join(Dog).where(
-        Dog.owner_user_id == current_user.id,
-        VetVisit.date >= today,
-        VetVisit.date <= limit_date
+
+# CALENDAR FEED
+@router.post("/calendar-token", response_model=CalendarFeedToken)
+async def rotate_calendar_feed_token(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """Create or replace the secret token of the user's iCalendar feed."""
+    user = await db.get(User, current_user.id)
+    user.calendar_feed_token = secrets.token_urlsafe(32)
+    await db.commit()
+    return CalendarFeedToken(
+        token=user.calendar_feed_token,
+        url=f"{settings.API_V1_STR}/reminders/calendar/{user.calendar_feed_token}.ics"
     )
-    vet_res = await db.execute(vet_query)
-    vets = vet_res.scalars().all()
-    
-    for v in vets:
-        d_res = await db.execute(select(Dog.name).where(Dog.id == v.dog_id))
-        d_name = d_res.scalar_one()
-        reminders.append(ReminderItem(
-            type="VET_VISIT",
-            id=v.id,
-            date=v.date,
-            title=f"Vet Visit: {v.reason}",
-            dog_name=d_name,
-            is_overdue=False
-        ))
-
-    # Sort by date
-    reminders.sort(key=lambda x: x.date)
-    return reminders
 
+@router.get("/calendar/{token}.ics")
+async def read_calendar_feed(
+    token: str,
+    request: Request,
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    # Authenticated by the feed token alone, calendar apps cannot send a JWT
+    result = await db.execute(select(User.id).where(User.calendar_feed_token == token))
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+
+    state = await reminder_scheduler.ensure_fresh(db, user_id)
+    feed = calendar_feed_cache.get(user_id, state.version)
+    if feed is None:
+        entries = await db.execute(
+            select(ReminderEntry)
+            .where(ReminderEntry.user_id == user_id, ReminderEntry.is_deleted == False)
+            .order_by(ReminderEntry.date, ReminderEntry.type, ReminderEntry.entity_id)
+        )
+        feed = calendar_feed_cache.put(
+            user_id, state.version, build_calendar(entries.scalars().all()), state.changed_at
+        )
+
+    headers = {
+        "ETag": feed.etag,
+        "Last-Modified": format_datetime(feed.last_modified.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "private, no-cache",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        if feed.etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*":
+            return Response(status_code=304, headers=headers)
+    elif if_modified_since is not None:
+        try:
+            if feed.last_modified <= parsedate_to_datetime(if_modified_since):
+                return Response(status_code=304, headers=headers)
+        except (TypeError, ValueError):
+            pass
+
+    return Response(content=feed.body, media_type="text/calendar; charset=utf-8", headers=headers)
@@ -2,11 +2,12 @@ from typing import Annotated, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.core.ownership import require_dog
 from app.models.user import User
-from app.models.dogs import Dog
 from app.models.training import TrainingGoal, BehaviorIssue, TrainingLog
 from app.models.tags import Tag, TagAssignment
+from app.services.activity import sync_activity, TRAINING
 from app.schemas.training import (
     TrainingGoalCreate, TrainingGoalUpdate, TrainingGoalResponse,
     BehaviorIssueCreate, BehaviorIssueUpdate, BehaviorIssueResponse,
@@ -16,10 +17,26 @@ from app.schemas.training import (
 router = APIRouter()
 
 # Helpers
-async def check_dog_permission(db: AsyncSession, dog_id: int, user_id: int):
-    result = await db.execute(select(Dog).where(Dog.id == dog_id, Dog.owner_user_id == user_id))
-    if not result.scalars().first():
-        raise HTTPException(status_code=404, detail="Dog not found")
+def goals_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(TrainingGoal).where(TrainingGoal.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(TrainingGoal.dog_id == dog_id)
+    return query
+
+def issues_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(BehaviorIssue).where(BehaviorIssue.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(BehaviorIssue.dog_id == dog_id)
+    return query
+
+def logs_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(TrainingLog).where(TrainingLog.owner_user_id == user_id)
+    if dog_id:
+        query = query.where(TrainingLog.dog_id == dog_id)
+    return query
+
+def goal_log_ids_query(goal_id: int):
+    return select(TrainingLog.id).where(TrainingLog.training_goal_id == goal_id)
 
 async def assign_tags(db: AsyncSession, entity_type: str, entity_id: int, tag_ids: List[int], user_id: int):
     if not tag_ids:
@@ -39,13 +56,10 @@ async def assign_tags(db: AsyncSession, entity_type: str, entity_id: int, tag_id
 @router.get("/goals", response_model=List[TrainingGoalResponse])
 async def read_goals(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(TrainingGoal).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(TrainingGoal.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(goals_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/goals", response_model=TrainingGoalResponse)
@@ -54,8 +68,8 @@ async def create_goal(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    await check_dog_permission(db, goal_in.dog_id, current_user.id)
-    goal = TrainingGoal(**goal_in.model_dump())
+    await require_dog(db, current_user.id, goal_in.dog_id)
+    goal = TrainingGoal(**goal_in.model_dump(), owner_user_id=current_user.id)
     db.add(goal)
     await db.commit()
     await db.refresh(goal)
@@ -68,15 +82,18 @@ async def update_goal(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(TrainingGoal).join(Dog).where(TrainingGoal.id == goal_id, Dog.owner_user_id == current_user.id))
-    goal = result.scalars().first()
-    if not goal:
+    goal = await db.get(TrainingGoal, goal_id)
+    if not goal or goal.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Goal not found")
         
     update_data = goal_in.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(goal, key, value)
         
+    # Log titles in the activity feed are derived from the goal title
+    await db.flush()
+    log_ids = await db.execute(goal_log_ids_query(goal.id))
+    await sync_activity(db, TRAINING, log_ids.scalars().all())
     await db.commit()
     await db.refresh(goal)
     return goal
@@ -87,11 +104,14 @@ async def delete_goal(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(TrainingGoal).join(Dog).where(TrainingGoal.id == goal_id, Dog.owner_user_id == current_user.id))
-    goal = result.scalars().first()
-    if not goal:
+    goal = await db.get(TrainingGoal, goal_id)
+    if not goal or goal.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Goal not found")
+    log_ids = await db.execute(goal_log_ids_query(goal.id))
+    log_ids = log_ids.scalars().all()
     await db.delete(goal)
+    await db.flush()
+    await sync_activity(db, TRAINING, log_ids)
     await db.commit()
     return {"ok": True}
 
@@ -99,13 +119,10 @@ async def delete_goal(
 @router.get("/issues", response_model=List[BehaviorIssueResponse])
 async def read_issues(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(BehaviorIssue).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(BehaviorIssue.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(issues_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/issues", response_model=BehaviorIssueResponse)
@@ -114,8 +131,8 @@ async def create_issue(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    await check_dog_permission(db, issue_in.dog_id, current_user.id)
-    issue = BehaviorIssue(**issue_in.model_dump())
+    await require_dog(db, current_user.id, issue_in.dog_id)
+    issue = BehaviorIssue(**issue_in.model_dump(), owner_user_id=current_user.id)
     db.add(issue)
     await db.commit()
     await db.refresh(issue)
@@ -128,9 +145,8 @@ async def update_issue(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(BehaviorIssue).join(Dog).where(BehaviorIssue.id == issue_id, Dog.owner_user_id == current_user.id))
-    issue = result.scalars().first()
-    if not issue:
+    issue = await db.get(BehaviorIssue, issue_id)
+    if not issue or issue.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Issue not found")
         
     update_data = issue_in.model_dump(exclude_unset=True)
@@ -146,9 +162,8 @@ async def delete_issue(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(BehaviorIssue).join(Dog).where(BehaviorIssue.id == issue_id, Dog.owner_user_id == current_user.id))
-    issue = result.scalars().first()
-    if not issue:
+    issue = await db.get(BehaviorIssue, issue_id)
+    if not issue or issue.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Issue not found")
     await db.delete(issue)
     await db.commit()
@@ -158,13 +173,10 @@ async def delete_issue(
 @router.get("/logs", response_model=List[TrainingLogResponse])
 async def read_logs(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(TrainingLog).join(Dog).where(Dog.owner_user_id == current_user.id)
-    if dog_id:
-        query = query.where(TrainingLog.dog_id == dog_id)
-    result = await db.execute(query)
+    result = await db.execute(logs_query(current_user.id, dog_id))
     return result.scalars().all()
 
 @router.post("/logs", response_model=TrainingLogResponse)
@@ -173,20 +185,22 @@ async def create_log(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    await check_dog_permission(db, log_in.dog_id, current_user.id)
+    await require_dog(db, current_user.id, log_in.dog_id)
     
     # Verify goal/issue if provided
     if log_in.training_goal_id:
-         g = await db.execute(select(TrainingGoal).where(TrainingGoal.id == log_in.training_goal_id))
+         g = await db.execute(select(TrainingGoal).where(TrainingGoal.id == log_in.training_goal_id, TrainingGoal.owner_user_id == current_user.id))
          if not g.scalars().first(): raise HTTPException(404, "Goal not found")
          
     if log_in.behavior_issue_id:
-         i = await db.execute(select(BehaviorIssue).where(BehaviorIssue.id == log_in.behavior_issue_id))
+         i = await db.execute(select(BehaviorIssue).where(BehaviorIssue.id == log_in.behavior_issue_id, BehaviorIssue.owner_user_id == current_user.id))
          if not i.scalars().first(): raise HTTPException(404, "Issue not found")
 
     log_data = log_in.model_dump(exclude={"tag_ids"})
-    log = TrainingLog(**log_data)
+    log = TrainingLog(**log_data, owner_user_id=current_user.id)
     db.add(log)
+    await db.flush()
+    await sync_activity(db, TRAINING, [log.id])
     await db.commit()
     await db.refresh(log)
     
@@ -202,11 +216,12 @@ async def delete_log(
     current_user: Annotated[User, Depends(get_current_user)],
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
-    result = await db.execute(select(TrainingLog).join(Dog).where(TrainingLog.id == log_id, Dog.owner_user_id == current_user.id))
-    log = result.scalars().first()
-    if not log:
+    log = await db.get(TrainingLog, log_id)
+    if not log or log.owner_user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Log not found")
     await db.delete(log)
+    await db.flush()
+    await sync_activity(db, TRAINING, [log_id])
     await db.commit()
     return {"ok": True}
 
@@ -1,20 +1,92 @@
 from typing import Annotated, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, status
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.core.deps import get_current_user, get_db
+from sqlalchemy import select, delete, func, cast, Date
+from app.core.deps import get_current_user, get_db, get_read_db
+from app.core.ownership import owned_dog_ids, require_dogs
 from app.models.user import User
-from app.models.dogs import Dog
-from app.models.walks import Walk, WalkDog
+from app.models.walks import Walk, WalkDog, WalkTrack, WalkStatsDaily
 from app.models.tags import Tag, TagAssignment
-from app.schemas.walks import WalkCreate, WalkUpdate, WalkResponse
-import shutil
-import os
-from pathlib import Path
-import time
+from app.schemas.walks import WalkCreate, WalkUpdate, WalkResponse, WalkRouteResponse, WalkStatsBucket
+from app.services.activity import sync_activity, WALK
+from app.services.gpx import ingest_gpx, decode_track
+from app.services.routes import zoom_tolerance_m, project_m, simplify_mask, encode_polyline, route_cache
+from app.services.spatial import candidate_walk_ids, radius_bbox, track_in_box, track_near
+from app.services.tracks import save_walk_track, delete_walk_track
+from app.services.heatmap import (
+    MAX_HEATMAP_ZOOM, TILE_SIZE, tile_bounds, render_tile, tile_generation, read_cached_tile, write_cached_tile,
+    invalidate_tiles, walk_bbox
+)
+from app.services.uploads import GPX
+from app.services.static_files import accepts_encoding, etag_matches
+from app.services.media import stage_upload, publish_upload, discard_upload, replace_media, release_media
+from app.services.walk_stats import GRANULARITIES, walk_stat_keys, sync_walk_stats
+from app.services.vector_tiles import MAX_VECTOR_ZOOM, BUFFER_PX, render_vector_tile, vector_tile_cache
+from datetime import date
+import gzip
+import hashlib
 
 router = APIRouter()
 
+DEFAULT_ROUTE_TOLERANCE_M = 5.0
+
+DEFAULT_SEARCH_RADIUS_M = 250.0
+MAX_SEARCH_RADIUS_M = 50_000.0
+
+def parse_coordinates(value: str, count: int, name: str) -> List[float]:
+    try:
+        numbers = [float(part) for part in value.split(",")]
+    except ValueError:
+        numbers = []
+    if len(numbers) != count:
+        raise HTTPException(status_code=400, detail=f"{name} must be {count} comma separated numbers")
+    return numbers
+
+HEATMAP_CACHE_CONTROL = "private, max-age=300"
+
+def build_heatmap_tile(user_id: int, generation: str, z: int, x: int, y: int, blobs: List[bytes]) -> bytes:
+    png = render_tile((decode_track(data) for data in blobs), z, x, y)
+    write_cached_tile(user_id, generation, z, x, y, png)
+    return png
+
+def build_vector_tile(rows, z: int, x: int, y: int) -> bytes:
+    return render_vector_tile(((walk_id, distance, decode_track(data)) for walk_id, distance, data in rows), z, x, y)
+
+def walks_query(user_id: int, dog_id: Optional[int] = None):
+    query = select(Walk).where(Walk.user_id == user_id)
+    if dog_id:
+        query = query.join(WalkDog).where(WalkDog.dog_id == dog_id)
+    return query
+
+async def track_version(db: AsyncSession, user_id: int):
+    """Count and latest track and walk update of a user's walks with tracks,
+    which versions the vector tiles."""
+    return (await db.execute(
+        select(
+            func.count(WalkTrack.walk_id).label("tracks"),
+            func.max(WalkTrack.updated_at).label("track_updated_at"),
+            func.max(Walk.updated_at).label("walk_updated_at"),
+        )
+        .join(Walk, Walk.id == WalkTrack.walk_id)
+        .where(Walk.user_id == user_id)
+    )).one()
+
+async def candidate_tile_walks(db: AsyncSession, user_id: int, z: int, x: int, y: int, buffer_px: float) -> List[int]:
+    min_lat, min_lon, max_lat, max_lon = tile_bounds(z, x, y)
+    pad_lat = (max_lat - min_lat) * buffer_px / TILE_SIZE
+    pad_lon = (max_lon - min_lon) * buffer_px / TILE_SIZE
+    return await candidate_walk_ids(db, user_id, min_lat - pad_lat, min_lon - pad_lon, max_lat + pad_lat, max_lon + pad_lon)
+
+def confirm_matches(rows, predicate) -> List[int]:
+    return [walk_id for walk_id, data in rows if predicate(decode_track(data))]
+
+def simplify_route(data: bytes, tolerance: float):
+    points = decode_track(data)
+    keep = simplify_mask(project_m(points["lat"], points["lon"]), tolerance)
+    return len(points), int(keep.sum()), encode_polyline(points["lat"][keep], points["lon"][keep])
+
 async def assign_tags(db: AsyncSession, entity_type: str, entity_id: int, tag_ids: List[int], user_id: int):
     if not tag_ids:
         return
@@ -27,18 +99,179 @@ async def assign_tags(db: AsyncSession, entity_type: str, entity_id: int, tag_id
 @router.get("/", response_model=List[WalkResponse])
 async def read_walks(
     current_user: Annotated[User, Depends(get_current_user)],
-    db: Annotated[AsyncSession, Depends(get_db)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
     dog_id: Optional[int] = None
 ):
-    query = select(Walk).where(Walk.user_id == current_user.id)
-    
+    result = await db.execute(walks_query(current_user.id, dog_id))
+    return result.scalars().all()
+
+@router.get("/stats", response_model=List[WalkStatsBucket])
+async def read_walk_stats(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    dog_id: Optional[int] = None,
+    granularity: str = "week",
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to")
+):
+    """Walk count, time and distance per dog and day, week or month.
+
+    Served from the `walk_stats_daily` rollup; periods start on their
+    first day (weeks on Monday), `from`/`to` filter whole days.
+    """
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    period = cast(func.date_trunc(granularity, WalkStatsDaily.day), Date).label("period_start")
+    query = (
+        select(
+            WalkStatsDaily.dog_id,
+            period,
+            func.sum(WalkStatsDaily.walk_count).label("walk_count"),
+            func.sum(WalkStatsDaily.total_minutes).label("total_minutes"),
+            func.sum(WalkStatsDaily.total_distance_km).label("total_distance_km"),
+        )
+        .where(WalkStatsDaily.dog_id.in_(await owned_dog_ids(db, current_user.id)))
+        .group_by(WalkStatsDaily.dog_id, period)
+        .order_by(period, WalkStatsDaily.dog_id)
+    )
     if dog_id:
-        # Join with WalkDog
-        query = query.join(WalkDog).where(WalkDog.dog_id == dog_id)
-        
+        query = query.where(WalkStatsDaily.dog_id == dog_id)
+    if from_date:
+        query = query.where(WalkStatsDaily.day >= from_date)
+    if to_date:
+        query = query.where(WalkStatsDaily.day <= to_date)
+
     result = await db.execute(query)
+    return [
+        WalkStatsBucket(
+            dog_id=row.dog_id,
+            period_start=row.period_start,
+            walk_count=row.walk_count,
+            total_minutes=row.total_minutes,
+            total_distance_km=round(row.total_distance_km, 3),
+        )
+        for row in result.all()
+    ]
+
+@router.get("/search", response_model=List[WalkResponse])
+async def search_walks(
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_read_db)],
+    bbox: Optional[str] = None,
+    near: Optional[str] = None,
+    radius: float = DEFAULT_SEARCH_RADIUS_M
+):
+    """Walks whose route passes through an area.
+
+    `bbox=min_lon,min_lat,max_lon,max_lat`, or `near=lat,lon` with a
+    `radius` in meters. Candidates come from the grid cell index and are
+    confirmed against the stored track points.
+    """
+    if (bbox is None) == (near is None):
+        raise HTTPException(status_code=400, detail="Pass either bbox or near")
+
+    if bbox is not None:
+        min_lon, min_lat, max_lon, max_lat = parse_coordinates(bbox, 4, "bbox")
+        if min_lat > max_lat or min_lon > max_lon:
+            raise HTTPException(status_code=400, detail="bbox minimum exceeds maximum")
+        box = (min_lat, min_lon, max_lat, max_lon)
+        predicate = lambda points: track_in_box(points, *box)
+    else:
+        lat, lon = parse_coordinates(near, 2, "near")
+        if not 0 < radius <= MAX_SEARCH_RADIUS_M:
+            raise HTTPException(status_code=400, detail=f"radius must be between 0 and {MAX_SEARCH_RADIUS_M:g} meters")
+        box = radius_bbox(lat, lon, radius)
+        predicate = lambda points: track_near(points, lat, lon, radius)
+
+    candidates = await candidate_walk_ids(db, current_user.id, *box)
+    if not candidates:
+        return []
+    tracks = await db.execute(select(WalkTrack.walk_id, WalkTrack.data).where(WalkTrack.walk_id.in_(candidates)))
+    matches = await run_in_threadpool(confirm_matches, tracks.all(), predicate)
+    if not matches:
+        return []
+
+    result = await db.execute(
+        select(Walk).where(Walk.id.in_(matches)).order_by(Walk.start_datetime.desc())
+    )
     return result.scalars().all()
 
+@router.get("/heatmap/{z}/{x}/{y}.png", response_class=FileResponse)
+async def read_heatmap_tile(
+    z: int,
+    x: int,
+    y: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """XYZ raster tile of where the user's walks went, rendered once and cached on disk."""
+    if not 0 <= z <= MAX_HEATMAP_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    path = read_cached_tile(current_user.id, z, x, y)
+    if path is not None:
+        return FileResponse(path, media_type="image/png", headers={"Cache-Control": HEATMAP_CACHE_CONTROL})
+
+    # Taken before the tracks are read, see app.services.heatmap
+    generation = await run_in_threadpool(tile_generation, current_user.id)
+    # Pad by one pixel so lines ending just outside the tile still connect
+    candidates = await candidate_tile_walks(db, current_user.id, z, x, y, 1)
+    blobs = []
+    if candidates:
+        tracks = await db.execute(select(WalkTrack.data).where(WalkTrack.walk_id.in_(candidates)))
+        blobs = tracks.scalars().all()
+    png = await run_in_threadpool(build_heatmap_tile, current_user.id, generation, z, x, y, blobs)
+    return Response(content=png, media_type="image/png", headers={"Cache-Control": HEATMAP_CACHE_CONTROL})
+
+@router.get("/tiles/{z}/{x}/{y}.geojson")
+async def read_vector_tile(
+    z: int,
+    x: int,
+    y: int,
+    request: Request,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    """XYZ tile of simplified, clipped walk routes as gzip'd GeoJSON.
+
+    Features carry the `walk_id` so clients can open the walk on click.
+    Cached per user data version (track count, latest track and walk
+    update), which also makes the ETag, so unchanged tiles revalidate with a 304.
+    Clients that do not accept gzip get the plain body under its own ETag.
+    """
+    if not 0 <= z <= MAX_VECTOR_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        raise HTTPException(status_code=404, detail="Tile not found")
+
+    version = await track_version(db, current_user.id)
+    gzipped = accepts_encoding(request.headers.get("accept-encoding", ""), "gzip")
+    tag = hashlib.sha1(f"{current_user.id}:{':'.join(map(str, version))}:{z}/{x}/{y}".encode()).hexdigest()
+    etag = f'"{tag}-gz"' if gzipped else f'"{tag}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    cache_key = (current_user.id, tuple(version), z, x, y)
+    body = vector_tile_cache.get(cache_key)
+    if body is None:
+        candidates = await candidate_tile_walks(db, current_user.id, z, x, y, BUFFER_PX)
+        rows = []
+        if candidates:
+            result = await db.execute(
+                select(Walk.id, Walk.distance_km, WalkTrack.data)
+                .join(WalkTrack, WalkTrack.walk_id == Walk.id)
+                .where(Walk.id.in_(candidates))
+            )
+            rows = result.all()
+        body = await run_in_threadpool(build_vector_tile, rows, z, x, y)
+        vector_tile_cache.put(cache_key, body)
+
+    if gzipped:
+        headers["Content-Encoding"] = "gzip"
+    else:
+        body = gzip.decompress(body)
+    return Response(content=body, media_type="application/geo+json", headers=headers)
+
 @router.post("/", response_model=WalkResponse)
 async def create_walk(
     walk_in: WalkCreate,
@@ -46,11 +279,7 @@ async def create_walk(
     db: Annotated[AsyncSession, Depends(get_db)]
 ):
     # Verify dogs belong to user
-    dogs_result = await db.execute(select(Dog).where(Dog.id.in_(walk_in.dog_ids), Dog.owner_user_id == current_user.id))
-    valid_dogs = dogs_result.scalars().all()
-    
-    if len(valid_dogs) != len(set(walk_in.dog_ids)):
-         raise HTTPException(status_code=400, detail="One or more dogs not found or access denied")
+    await require_dogs(db, current_user.id, walk_in.dog_ids)
 
     walk_data = walk_in.model_dump(exclude={"dog_ids", "tag_ids"})
     walk = Walk(**walk_data, user_id=current_user.id)
@@ -67,6 +296,41 @@ async def create_walk(
     if walk_in.tag_ids:
         await assign_tags(db, "WALK", walk.id, walk_in.tag_ids, current_user.id)
         
+    await db.flush()
+    await sync_activity(db, WALK, [walk.id])
+    await sync_walk_stats(db, await walk_stat_keys(db, [walk.id]))
+    await db.commit()
+    await db.refresh(walk)
+    return walk
+
+@router.put("/{walk_id}", response_model=WalkResponse)
+async def update_walk(
+    walk_id: int,
+    walk_in: WalkUpdate,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)]
+):
+    result = await db.execute(select(Walk).where(Walk.id == walk_id, Walk.user_id == current_user.id))
+    walk = result.scalars().first()
+    if not walk:
+        raise HTTPException(status_code=404, detail="Walk not found")
+
+    update_data = walk_in.model_dump(exclude_unset=True, exclude={"dog_ids"})
+    dog_ids = walk_in.dog_ids
+    if dog_ids is not None:
+        await require_dogs(db, current_user.id, dog_ids)
+
+    stat_keys = await walk_stat_keys(db, [walk.id])
+    for key, value in update_data.items():
+        setattr(walk, key, value)
+    if dog_ids is not None:
+        await db.execute(delete(WalkDog).where(WalkDog.walk_id == walk.id))
+        for dog_id in set(dog_ids):
+            db.add(WalkDog(walk_id=walk.id, dog_id=dog_id))
+
+    await db.flush()
+    await sync_activity(db, WALK, [walk.id])
+    await sync_walk_stats(db, stat_keys | await walk_stat_keys(db, [walk.id]))
     await db.commit()
     await db.refresh(walk)
     return walk
@@ -87,22 +351,72 @@ async def upload_gpx(
     if not file.filename.lower().endswith(('.gpx', '.xml')):
          raise HTTPException(status_code=400, detail="Invalid file type. Must be GPX/XML")
 
-    upload_dir = Path("/app/media/walks/gpx")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    filename = f"{walk.id}_{int(time.time())}.gpx"
-    file_path = upload_dir / filename
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-        
-    walk.gpx_file_url = f"/media/walks/gpx/{filename}"
+    staged = await stage_upload(file, GPX)
+
+    # Parse once on upload, clients and other endpoints use the stored track
+    try:
+        ingested = await run_in_threadpool(ingest_gpx, str(staged.path))
+    except ValueError as e:
+        await discard_upload(staged)
+        raise HTTPException(status_code=400, detail=str(e))
+    media = await publish_upload(staged, ".gpx")
+
+    previous_bbox = walk_bbox(walk)
+    await save_walk_track(db, walk, ingested)
+    await replace_media(db, walk.gpx_file_url, media.url, media.size)
+    walk.gpx_file_url = media.url
     walk.has_route_data = True
     
     await db.commit()
     await db.refresh(walk)
+    await run_in_threadpool(invalidate_tiles, current_user.id, [previous_bbox, walk_bbox(walk)])
     return walk
 
+@router.get("/{walk_id}/route", response_model=WalkRouteResponse)
+async def read_walk_route(
+    walk_id: int,
+    current_user: Annotated[User, Depends(get_current_user)],
+    db: Annotated[AsyncSession, Depends(get_db)],
+    tolerance: Optional[float] = None,
+    zoom: Optional[int] = None
+):
+    """Simplified route geometry for map display.
+
+    `zoom` picks a tolerance of one screen pixel at that web map zoom level,
+    `tolerance` sets it in meters directly. Results are cached per level.
+    """
+    result = await db.execute(
+        select(WalkTrack.updated_at, Walk.min_lat, Walk.max_lat)
+        .join(Walk, Walk.id == WalkTrack.walk_id)
+        .where(Walk.id == walk_id, Walk.user_id == current_user.id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="Route not found")
+
+    if zoom is not None:
+        zoom = max(0, min(zoom, 22))
+        tolerance = zoom_tolerance_m(zoom, (row.min_lat + row.max_lat) / 2)
+    elif tolerance is not None:
+        tolerance = round(max(tolerance, 0.0), 1)
+    else:
+        tolerance = DEFAULT_ROUTE_TOLERANCE_M
+
+    cache_key = (walk_id, row.updated_at, round(tolerance, 3))
+    route = route_cache.get(cache_key)
+    if route is None:
+        data = (await db.execute(select(WalkTrack.data).where(WalkTrack.walk_id == walk_id))).scalar_one()
+        original_count, count, polyline = await run_in_threadpool(simplify_route, data, tolerance)
+        route = WalkRouteResponse(
+            walk_id=walk_id,
+            tolerance_m=round(tolerance, 3),
+            point_count=count,
+            original_point_count=original_count,
+            polyline=polyline
+        )
+        route_cache.put(cache_key, route)
+    return route
+
 @router.delete("/{walk_id}")
 async def delete_walk(
     walk_id: int,
@@ -113,7 +427,15 @@ async def delete_walk(
     walk = result.scalars().first()
     if not walk:
         raise HTTPException(status_code=404, detail="Walk not found")
+    bbox = walk_bbox(walk)
+    stat_keys = await walk_stat_keys(db, [walk.id])
+    await delete_walk_track(db, walk)
+    await release_media(db, walk.gpx_file_url)
     await db.delete(walk)
+    await db.flush()
+    await sync_activity(db, WALK, [walk_id])
+    await sync_walk_stats(db, stat_keys)
     await db.commit()
+    await run_in_threadpool(invalidate_tiles, current_user.id, [bbox])
     return {"ok": True}
 
@@ -14,6 +14,7 @@ class CareTaskBase(BaseModel):
     description: Optional[str] = None
     interval_type: IntervalType
     interval_days: Optional[int] = None
+    rrule: Optional[str] = None
     next_due_date: date
     is_active: bool = True
 
@@ -25,6 +26,7 @@ class CareTaskUpdate(BaseModel):
     description: Optional[str] = None
     interval_type: Optional[IntervalType] = None
     interval_days: Optional[int] = None
+    rrule: Optional[str] = None
     next_due_date: Optional[date] = None
     is_active: Optional[bool] = None
 
@@ -35,6 +37,21 @@ class CareTaskResponse(CareTaskBase):
     class Config:
         from_attributes = True
 
+class CareTaskCompletion(BaseModel):
+    task_id: int
+    notes: Optional[str] = None
+    done_at: Optional[datetime] = None
+
+class CareTaskBatchComplete(BaseModel):
+    items: List[CareTaskCompletion]
+
+class CareOccurrence(BaseModel):
+    task_id: int
+    dog_id: int
+    title: str
+    date: date
+    is_overdue: bool = False
+
 class CareTaskLogBase(BaseModel):
     done_at: datetime
     notes: Optional[str] = None
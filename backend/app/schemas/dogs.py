@@ -46,10 +46,17 @@ class DogUpdate(BaseModel):
     weight_kg: Optional[float] = None
     notes: Optional[str] = None
 
+class AvatarRendition(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str # webp, jpeg
+
 class DogResponse(DogBase):
     id: int
     owner_user_id: int
     avatar_image_url: Optional[str] = None
+    avatar_renditions: Optional[List[AvatarRendition]] = None # for srcset, e.g. "<url> 256w"
     details: Optional[DogProfileDetailsResponse] = None
 
     class Config:
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import Optional, List
-from datetime import datetime
+from datetime import datetime, date
 from enum import Enum
 
 class WalkMood(str, Enum):
@@ -34,9 +34,30 @@ class WalkResponse(WalkBase):
     user_id: int
     gpx_file_url: Optional[str]
     has_route_data: bool
+    track_duration_seconds: Optional[int] = None
+    elevation_gain_m: Optional[float] = None
+    min_lat: Optional[float] = None
+    min_lon: Optional[float] = None
+    max_lat: Optional[float] = None
+    max_lon: Optional[float] = None
     
     # We will need to include Dog info here probably, or just IDs
     
     class Config:
         from_attributes = True
 
+
+class WalkRouteResponse(BaseModel):
+    walk_id: int
+    tolerance_m: float
+    point_count: int
+    original_point_count: int
+    polyline: str # Google encoded polyline, precision 5
+
+
+class WalkStatsBucket(BaseModel):
+    dog_id: int
+    period_start: date
+    walk_count: int
+    total_minutes: int
+    total_distance_km: float
@@ -0,0 +1,143 @@
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, union_all, literal, cast, func, DateTime, String, Text
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from app.models.activity import ActivityEvent
+from app.models.dogs import Dog
+from app.models.walks import Walk, WalkDog
+from app.models.training import TrainingLog, TrainingGoal
+from app.models.health import VetVisit
+from app.models.care import CareTaskLog, CareTask
+
+WALK = "WALK"
+TRAINING = "TRAINING"
+VET = "VET"
+CARE = "CARE"
+
+EVENT_COLUMNS = ["user_id", "type", "entity_id", "occurred_at", "title", "description", "dog_names"]
+
+def _walk_source():
+    dog_names = (
+        select(cast(func.array_agg(Dog.name), ARRAY(Text)))
+        .select_from(WalkDog)
+        .join(Dog, Dog.id == WalkDog.dog_id)
+        .where(WalkDog.walk_id == Walk.id)
+        .scalar_subquery()
+    )
+    query = select(
+        Walk.user_id.label("user_id"),
+        literal(WALK, String).label("type"),
+        Walk.id.label("entity_id"),
+        Walk.start_datetime.label("occurred_at"),
+        ("Walk (" + cast(Walk.duration_minutes, String) + " min)").label("title"),
+        cast(Walk.mood, Text).label("description"),
+        func.coalesce(dog_names, cast(array([]), ARRAY(Text))).label("dog_names"),
+    )
+    return query, Walk.id
+
+def _training_source():
+    query = (
+        select(
+            Dog.owner_user_id.label("user_id"),
+            literal(TRAINING, String).label("type"),
+            TrainingLog.id.label("entity_id"),
+            TrainingLog.datetime.label("occurred_at"),
+            func.coalesce("Training: " + TrainingGoal.title, "Training Session").label("title"),
+            ("Rating: " + cast(TrainingLog.rating, String) + "/5").label("description"),
+            cast(array([Dog.name]), ARRAY(Text)).label("dog_names"),
+        )
+        .join(Dog, Dog.id == TrainingLog.dog_id)
+        .outerjoin(TrainingGoal, TrainingGoal.id == TrainingLog.training_goal_id)
+    )
+    return query, TrainingLog.id
+
+def _vet_source():
+    query = (
+        select(
+            Dog.owner_user_id.label("user_id"),
+            literal(VET, String).label("type"),
+            VetVisit.id.label("entity_id"),
+            cast(VetVisit.date, DateTime(timezone=True)).label("occurred_at"),
+            ("Vet: " + VetVisit.reason).label("title"),
+            cast(VetVisit.diagnosis, Text).label("description"),
+            cast(array([Dog.name]), ARRAY(Text)).label("dog_names"),
+        )
+        .join(Dog, Dog.id == VetVisit.dog_id)
+    )
+    return query, VetVisit.id
+
+def _care_source():
+    query = (
+        select(
+            Dog.owner_user_id.label("user_id"),
+            literal(CARE, String).label("type"),
+            CareTaskLog.id.label("entity_id"),
+            CareTaskLog.done_at.label("occurred_at"),
+            ("Care: " + CareTask.title).label("title"),
+            cast(None, Text).label("description"),
+            cast(array([Dog.name]), ARRAY(Text)).label("dog_names"),
+        )
+        .join(CareTask, CareTask.id == CareTaskLog.care_task_id)
+        .join(Dog, Dog.id == CareTask.dog_id)
+    )
+    return query, CareTaskLog.id
+
+SOURCES = {
+    WALK: _walk_source,
+    TRAINING: _training_source,
+    VET: _vet_source,
+    CARE: _care_source,
+}
+
+async def sync_activity(db: AsyncSession, type_: str, entity_ids: Sequence[int]):
+    """Re-derive the feed rows of the given entities from their source tables.
+
+    Runs inside the caller's transaction, so call it after the write has been
+    flushed and before the commit. Entities that no longer exist simply lose
+    their feed row, which makes this the delete hook as well.
+    """
+    entity_ids = list(entity_ids)
+    if not entity_ids:
+        return
+    await db.execute(
+        delete(ActivityEvent).where(ActivityEvent.type == type_, ActivityEvent.entity_id.in_(entity_ids))
+    )
+    source, id_col = SOURCES[type_]()
+    await db.execute(
+        insert(ActivityEvent).from_select(EVENT_COLUMNS, source.where(id_col.in_(entity_ids)))
+    )
+
+async def dog_activity_ids(db: AsyncSession, dog_id: int) -> Dict[str, List[int]]:
+    """Ids of every feed entity that shows the given dog."""
+    walks = await db.execute(select(WalkDog.walk_id).where(WalkDog.dog_id == dog_id))
+    tlogs = await db.execute(select(TrainingLog.id).where(TrainingLog.dog_id == dog_id))
+    visits = await db.execute(select(VetVisit.id).where(VetVisit.dog_id == dog_id))
+    clogs = await db.execute(select(CareTaskLog.id).join(CareTask).where(CareTask.dog_id == dog_id))
+    return {
+        WALK: list(walks.scalars().all()),
+        TRAINING: list(tlogs.scalars().all()),
+        VET: list(visits.scalars().all()),
+        CARE: list(clogs.scalars().all()),
+    }
+
+async def sync_dog_activity(db: AsyncSession, ids_by_type: Dict[str, List[int]]):
+    for type_, entity_ids in ids_by_type.items():
+        await sync_activity(db, type_, entity_ids)
+
+async def rebuild_activity(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Drop and rebuild the feed from the source tables (backfill/repair)."""
+    clear = delete(ActivityEvent)
+    branches = []
+    for make_source in SOURCES.values():
+        source, _ = make_source()
+        if user_id is not None:
+            source = source.where(source.selected_columns.user_id == user_id)
+        branches.append(source)
+    if user_id is not None:
+        clear = clear.where(ActivityEvent.user_id == user_id)
+
+    await db.execute(clear)
+    result = await db.execute(
+        insert(ActivityEvent).from_select(EVENT_COLUMNS, union_all(*branches))
+    )
+    return result.rowcount
@@ -0,0 +1,83 @@
+"""Avatar renditions.
+
+An uploaded avatar is resized to RENDITION_SIZES (longest side, never
+upscaled) in WebP and JPEG. Resizing is CPU bound and holds the GIL, so it
+runs in a small process pool, started and stopped with the app (see
+`start_pool`). Workers are spawned rather than forked: forking the
+multithreaded server can copy a lock held by another thread into the child
+and deadlock it. Renditions go to the content-addressed media
+store and are listed on the dog for `srcset` use.
+"""
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageOps
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.services.media import store_bytes, acquire_media, release_media
+
+RENDITION_SIZES = (64, 256, 1024)
+
+# format name -> (Pillow format, extension, save options)
+FORMATS = {
+    "webp": ("WEBP", ".webp", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", ".jpg", {"quality": 85, "optimize": True, "progressive": True}),
+}
+
+# What render_renditions raises for files that are not usable images
+INVALID_IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+def render_renditions(path: str) -> List[Tuple[str, int, int, bytes]]:
+    """(format, width, height, data) for every size and format. Runs in a worker process."""
+    with Image.open(path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGB")
+
+    renditions = []
+    for size in RENDITION_SIZES:
+        resized = image.copy()
+        resized.thumbnail((size, size), Image.LANCZOS)
+        for name, (fmt, _, options) in FORMATS.items():
+            buffer = io.BytesIO()
+            resized.save(buffer, fmt, **options)
+            renditions.append((name, resized.width, resized.height, buffer.getvalue()))
+    return renditions
+
+def start_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.AVATAR_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+
+def _get_pool() -> ProcessPoolExecutor:
+    if _pool is None:
+        raise RuntimeError("Avatar pool not started, call start_pool() first")
+    return _pool
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+async def create_renditions(path: str) -> List[Dict]:
+    """Render and store the renditions of an image file, returning their descriptors."""
+    loop = asyncio.get_running_loop()
+    rendered = await loop.run_in_executor(_get_pool(), render_renditions, path)
+    renditions = []
+    for name, width, height, data in rendered:
+        media = await store_bytes(data, FORMATS[name][1])
+        renditions.append({"url": media.url, "width": width, "height": height, "format": name, "size": media.size})
+    return renditions
+
+async def replace_renditions(db: AsyncSession, old: Optional[List[Dict]], new: Optional[List[Dict]]):
+    """Move the media references from the old to the new renditions."""
+    for rendition in new or []:
+        await acquire_media(db, rendition["url"], rendition.get("size"))
+    for rendition in old or []:
+        await release_media(db, rendition["url"])
@@ -0,0 +1,85 @@
+import hashlib
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, NamedTuple, Optional
+from app.models.reminders import ReminderEntry
+
+PRODID = "-//Dog Management//Reminders//EN"
+
+class CalendarFeed(NamedTuple):
+    version: int
+    body: bytes
+    etag: str
+    last_modified: datetime
+
+def _escape(text: str) -> str:
+    return (text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n"))
+
+def _fold(line: str) -> str:
+    # RFC 5545: lines longer than 75 octets continue on lines starting with a space
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line
+    parts, current = [], b""
+    for char in line:
+        encoded = char.encode("utf-8")
+        if len(current) + len(encoded) > (75 if not parts else 74):
+            parts.append(current.decode("utf-8"))
+            current = b""
+        current += encoded
+    parts.append(current.decode("utf-8"))
+    return "\r\n ".join(parts)
+
+def build_calendar(entries: Iterable[ReminderEntry]) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        "X-WR-CALNAME:Dog Reminders",
+    ]
+    for entry in entries:
+        stamp = entry.updated_at.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:{entry.type.lower()}-{entry.entity_id}@dog-management",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART;VALUE=DATE:{entry.date.strftime('%Y%m%d')}",
+            f"DTEND;VALUE=DATE:{(entry.date + timedelta(days=1)).strftime('%Y%m%d')}",
+            f"SUMMARY:{_escape(f'{entry.title} ({entry.dog_name})')}",
+            f"CATEGORIES:{entry.type}",
+            "TRANSP:TRANSPARENT",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+class CalendarFeedCache:
+    """Rendered feeds keyed by user, valid for one reminder cache version."""
+
+    def __init__(self, max_entries: int = 1024):
+        self._feeds: "OrderedDict[int, CalendarFeed]" = OrderedDict()
+        self._max_entries = max_entries
+
+    def get(self, user_id: int, version: int) -> Optional[CalendarFeed]:
+        feed = self._feeds.get(user_id)
+        if feed is None or feed.version != version:
+            return None
+        self._feeds.move_to_end(user_id)
+        return feed
+
+    def put(self, user_id: int, version: int, body: bytes, last_modified: datetime) -> CalendarFeed:
+        feed = CalendarFeed(
+            version=version,
+            body=body,
+            etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"',
+            last_modified=last_modified.replace(microsecond=0),
+        )
+        self._feeds[user_id] = feed
+        self._feeds.move_to_end(user_id)
+        while len(self._feeds) > self._max_entries:
+            self._feeds.popitem(last=False)
+        return feed
+
+calendar_feed_cache = CalendarFeedCache()
@@ -0,0 +1,136 @@
+"""GPX ingestion and compact track storage.
+
+Tracks are parsed with a streaming parser and kept as a structured NumPy
+array of (lat, lon, ele, time) per point, stored in `walk_tracks` as an
+.npy blob. Everything downstream (stats, route simplification, search,
+tiles) works on these arrays and never re-reads the GPX file.
+"""
+import io
+import xml.etree.ElementTree as ET
+from array import array
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, NamedTuple, Optional, Union
+import numpy as np
+
+TRACK_DTYPE = np.dtype([("lat", "<f8"), ("lon", "<f8"), ("ele", "<f4"), ("time", "<i8")])
+
+# Marker for points without a <time>
+NO_TIME = np.iinfo(np.int64).min
+
+MAX_TRACK_POINTS = 1_000_000
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Drop parsed <trkpt> elements in batches so memory stays bounded
+_CLEAR_EVERY = 1024
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def _parse_time(text: Optional[str]) -> int:
+    if not text:
+        return NO_TIME
+    try:
+        moment = datetime.fromisoformat(text.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return NO_TIME
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return int(moment.timestamp())
+
+def parse_gpx(source: Union[str, BinaryIO]) -> np.ndarray:
+    """Stream all track/route points of a GPX document into a track array.
+
+    Raises ValueError for malformed documents or oversized tracks.
+    """
+    lats, lons, eles, times = array("d"), array("d"), array("f"), array("q")
+    stack = []
+    try:
+        for event, elem in ET.iterparse(source, events=("start", "end")):
+            if event == "start":
+                stack.append(elem)
+                continue
+            stack.pop()
+            if _local(elem.tag) not in ("trkpt", "rtept"):
+                continue
+
+            try:
+                lat, lon = float(elem.get("lat")), float(elem.get("lon"))
+            except (TypeError, ValueError):
+                raise ValueError("Track point without valid lat/lon")
+            ele, moment = float("nan"), None
+            for child in elem:
+                name = _local(child.tag)
+                if name == "ele" and child.text:
+                    try:
+                        ele = float(child.text)
+                    except ValueError:
+                        pass
+                elif name == "time":
+                    moment = child.text
+            lats.append(lat)
+            lons.append(lon)
+            eles.append(ele)
+            times.append(_parse_time(moment))
+            if len(lats) > MAX_TRACK_POINTS:
+                raise ValueError(f"Track has more than {MAX_TRACK_POINTS} points")
+
+            elem.clear()
+            if stack and len(stack[-1]) >= _CLEAR_EVERY:
+                del stack[-1][:]
+    except ET.ParseError as e:
+        raise ValueError(f"Malformed GPX: {e}")
+
+    points = np.empty(len(lats), dtype=TRACK_DTYPE)
+    points["lat"] = np.frombuffer(lats, dtype=np.float64)
+    points["lon"] = np.frombuffer(lons, dtype=np.float64)
+    points["ele"] = np.frombuffer(eles, dtype=np.float32)
+    points["time"] = np.frombuffer(times, dtype=np.int64)
+    return points
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Vectorized great-circle distance between coordinate arrays (degrees)."""
+    lat1, lon1, lat2, lon2 = (np.radians(v) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def track_stats(points: np.ndarray) -> Dict[str, Optional[float]]:
+    """Distance, duration, elevation gain and bounding box of a track."""
+    lat, lon = points["lat"], points["lon"]
+    distance_km = float(haversine_km(lat[:-1], lon[:-1], lat[1:], lon[1:]).sum()) if len(points) > 1 else 0.0
+
+    times = points["time"][points["time"] != NO_TIME]
+    duration = int(times.max() - times.min()) if len(times) > 1 else None
+
+    ele = points["ele"][~np.isnan(points["ele"])]
+    gain = float(np.clip(np.diff(ele), 0, None).sum()) if len(ele) > 1 else None
+
+    return {
+        "distance_km": round(distance_km, 3),
+        "track_duration_seconds": duration,
+        "elevation_gain_m": round(gain, 1) if gain is not None else None,
+        "min_lat": float(lat.min()),
+        "min_lon": float(lon.min()),
+        "max_lat": float(lat.max()),
+        "max_lon": float(lon.max()),
+    }
+
+def encode_track(points: np.ndarray) -> bytes:
+    buffer = io.BytesIO()
+    np.save(buffer, points.astype(TRACK_DTYPE, copy=False), allow_pickle=False)
+    return buffer.getvalue()
+
+def decode_track(data: bytes) -> np.ndarray:
+    return np.load(io.BytesIO(data), allow_pickle=False)
+
+class IngestedTrack(NamedTuple):
+    points: np.ndarray
+    stats: Dict[str, Optional[float]]
+    data: bytes
+
+def ingest_gpx(source: Union[str, BinaryIO]) -> IngestedTrack:
+    """Parse, measure and encode a GPX file. CPU bound, run it off the event loop."""
+    points = parse_gpx(source)
+    if len(points) == 0:
+        raise ValueError("GPX file contains no track points")
+    return IngestedTrack(points, track_stats(points), encode_track(points))
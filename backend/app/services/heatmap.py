@@ -0,0 +1,200 @@
+"""Raster heatmap tiles of all walks of a user.
+
+Tiles are standard 256px XYZ (web mercator) tiles. Each walk adds one to
+every pixel its densified track touches, so a pixel's value is the number
+of walks through it. Rendered tiles are cached on disk under
+`{CACHE_DIR}/heatmap/{user_id}/{z}/{x}/{y}.png`; when a walk changes only
+the tiles its bounding box touches are removed.
+
+A render can read the tracks before a change commits and write its tile
+after the tiles were removed. Each user has a generation token that
+invalidation replaces before removing tiles; a render takes the token
+before reading tracks and drops its own tile again when the token changed
+by the time the tile is in place.
+"""
+import math
+import os
+import uuid
+import struct
+import tempfile
+import zlib
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+import numpy as np
+from app.core.config import settings
+
+TILE_SIZE = 256
+
+MAX_HEATMAP_ZOOM = 18
+
+# Segments longer than this many pixels are not densified (GPS jumps)
+MAX_SEGMENT_PX = 4096
+
+# Walks per pixel at which the color scale saturates
+SATURATION_WALKS = 20
+
+# Blue -> yellow -> red, indexed by the normalized density
+_STOPS = np.array([0.0, 0.5, 1.0])
+_RED = np.array([40, 255, 220])
+_GREEN = np.array([90, 220, 30])
+_BLUE = np.array([220, 60, 30])
+
+BBox = Tuple[float, float, float, float]
+
+def tile_bounds(z: int, x: int, y: int) -> BBox:
+    """(min_lat, min_lon, max_lat, max_lon) of a tile."""
+    n = 2 ** z
+    def lat(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+    return lat(y + 1), x / n * 360 - 180, lat(y), (x + 1) / n * 360 - 180
+
+def tile_range(z: int, bbox: BBox) -> Tuple[int, int, int, int]:
+    """Inclusive (x0, y0, x1, y1) tile range covering a bounding box."""
+    min_lat, min_lon, max_lat, max_lon = bbox
+    n = 2 ** z
+    x0, y0 = mercator_pixels(np.array([max_lat]), np.array([min_lon]), z)
+    x1, y1 = mercator_pixels(np.array([min_lat]), np.array([max_lon]), z)
+    clamp = lambda v: max(0, min(n - 1, int(v[0] // TILE_SIZE)))
+    return clamp(x0), clamp(y0), clamp(x1), clamp(y1)
+
+def mercator_pixels(lat: np.ndarray, lon: np.ndarray, z: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Global pixel coordinates at zoom z."""
+    scale = TILE_SIZE * 2 ** z
+    lat = np.clip(lat, -85.05112878, 85.05112878)
+    x = (lon + 180.0) / 360.0 * scale
+    y = (1 - np.log(np.tan(np.radians(lat)) + 1 / np.cos(np.radians(lat))) / math.pi) / 2 * scale
+    return x, y
+
+def _walk_mask(points: np.ndarray, z: int, x: int, y: int) -> np.ndarray:
+    """Pixels of the tile touched by one track, as a flat boolean mask."""
+    px, py = mercator_pixels(points["lat"], points["lon"], z)
+    px -= x * TILE_SIZE
+    py -= y * TILE_SIZE
+
+    if len(px) > 1:
+        x0, x1, y0, y1 = px[:-1], px[1:], py[:-1], py[1:]
+        touching = (
+            (np.minimum(x0, x1) < TILE_SIZE) & (np.maximum(x0, x1) >= 0)
+            & (np.minimum(y0, y1) < TILE_SIZE) & (np.maximum(y0, y1) >= 0)
+        )
+        x0, x1, y0, y1 = x0[touching], x1[touching], y0[touching], y1[touching]
+        steps = np.ceil(np.maximum(np.abs(x1 - x0), np.abs(y1 - y0))).astype(np.int64)
+        steps = np.where(steps > MAX_SEGMENT_PX, 1, np.maximum(steps, 1))
+        segment = np.repeat(np.arange(len(steps)), steps)
+        fraction = (np.arange(len(segment)) - np.repeat(np.cumsum(steps) - steps, steps)) / np.repeat(steps, steps)
+        px = np.concatenate((px, x0[segment] + (x1[segment] - x0[segment]) * fraction))
+        py = np.concatenate((py, y0[segment] + (y1[segment] - y0[segment]) * fraction))
+
+    inside = (px >= 0) & (px < TILE_SIZE) & (py >= 0) & (py < TILE_SIZE)
+    flat = py[inside].astype(np.int64) * TILE_SIZE + px[inside].astype(np.int64)
+    mask = np.zeros(TILE_SIZE * TILE_SIZE, dtype=bool)
+    mask[flat] = True
+    return mask
+
+def render_tile(tracks: Iterable[np.ndarray], z: int, x: int, y: int) -> bytes:
+    """PNG of the walk density of the given tracks within one tile."""
+    counts = np.zeros(TILE_SIZE * TILE_SIZE, dtype=np.uint32)
+    for points in tracks:
+        counts += _walk_mask(points, z, x, y)
+
+    level = np.log1p(counts) / math.log1p(SATURATION_WALKS)
+    level = np.clip(level, 0.0, 1.0)
+    rgba = np.empty((TILE_SIZE * TILE_SIZE, 4), dtype=np.uint8)
+    rgba[:, 0] = np.interp(level, _STOPS, _RED)
+    rgba[:, 1] = np.interp(level, _STOPS, _GREEN)
+    rgba[:, 2] = np.interp(level, _STOPS, _BLUE)
+    rgba[:, 3] = np.where(counts > 0, 96 + level * 159, 0)
+    return encode_png(rgba.reshape(TILE_SIZE, TILE_SIZE, 4))
+
+def _chunk(kind: bytes, data: bytes) -> bytes:
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+def encode_png(rgba: np.ndarray) -> bytes:
+    """Minimal 8-bit RGBA PNG encoder for an (h, w, 4) uint8 array."""
+    height, width = rgba.shape[:2]
+    # Filter type 0 (none) in front of every scanline
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        _chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)),
+        _chunk(b"IDAT", zlib.compress(raw.tobytes(), 6)),
+        _chunk(b"IEND", b""),
+    ))
+
+def _user_dir(user_id: int) -> Path:
+    return Path(settings.CACHE_DIR) / "heatmap" / str(user_id)
+
+def _generation_path(user_id: int) -> Path:
+    return _user_dir(user_id) / ".generation"
+
+def tile_generation(user_id: int) -> str:
+    """Token to take before reading the tracks a tile is rendered from."""
+    try:
+        return _generation_path(user_id).read_text()
+    except FileNotFoundError:
+        return ""
+
+def _next_generation(user_id: int):
+    path = _generation_path(user_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        f.write(uuid.uuid4().hex)
+    os.replace(tmp, path)
+
+def tile_path(user_id: int, z: int, x: int, y: int) -> Path:
+    return _user_dir(user_id) / str(z) / str(x) / f"{y}.png"
+
+def read_cached_tile(user_id: int, z: int, x: int, y: int) -> Optional[Path]:
+    path = tile_path(user_id, z, x, y)
+    return path if path.is_file() else None
+
+def write_cached_tile(user_id: int, generation: str, z: int, x: int, y: int, png: bytes) -> bool:
+    """Cache a tile rendered under `generation`, False when it may be stale."""
+    if tile_generation(user_id) != generation:
+        return False
+    path = tile_path(user_id, z, x, y)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        f.write(png)
+    os.replace(tmp, path)
+    # An invalidation between the check and the rename may have missed it
+    if tile_generation(user_id) != generation:
+        path.unlink(missing_ok=True)
+        return False
+    return True
+
+def invalidate_tiles(user_id: int, boxes: Iterable[Optional[BBox]]):
+    """Remove cached tiles of a user that intersect any of the boxes.
+
+    Only walks existing tile directories, so the cost follows the number
+    of cached tiles rather than the number of tiles a box spans.
+    """
+    boxes = [box for box in boxes if box is not None]
+    if not boxes:
+        return
+    # Renders in flight took the old token and will not keep their tiles
+    _next_generation(user_id)
+    for zoom_dir in _user_dir(user_id).iterdir():
+        if not zoom_dir.name.isdigit():
+            continue
+        z = int(zoom_dir.name)
+        ranges = [tile_range(z, box) for box in boxes]
+        for column_dir in zoom_dir.iterdir():
+            if not column_dir.name.isdigit():
+                continue
+            x = int(column_dir.name)
+            rows = [(y0, y1) for x0, y0, x1, y1 in ranges if x0 <= x <= x1]
+            if not rows:
+                continue
+            for tile in column_dir.glob("*.png"):
+                y = int(tile.stem)
+                if any(y0 <= y <= y1 for y0, y1 in rows):
+                    tile.unlink(missing_ok=True)
+
+def walk_bbox(walk) -> Optional[BBox]:
+    if walk.min_lat is None:
+        return None
+    return walk.min_lat, walk.min_lon, walk.max_lat, walk.max_lon
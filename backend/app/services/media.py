@@ -0,0 +1,203 @@
+"""Content-addressed media store.
+
+Uploaded files live at `{MEDIA_ROOT}/sha256/ab/cd/<sha256>.<ext>` and are
+served as `/media/sha256/...`. A URL never changes content, so responses
+are cacheable forever and identical uploads share one file.
+
+`media_blobs` counts the references from `Dog.avatar_image_url` (and the
+avatar renditions in `Dog.avatar_renditions`), `Invoice.file_url` and
+`Walk.gpx_file_url`. Handlers adjust the count when
+they set or clear one of these; `sweep_media` recounts from the columns
+(covering cascaded deletes) and removes unreferenced blobs after a grace
+period that protects uploads whose transaction has not committed yet.
+"""
+import hashlib
+import os
+import tempfile
+import uuid
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, NamedTuple, Optional
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, update, delete, union_all, func
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.models.media import MediaBlob
+from app.models.dogs import Dog
+from app.models.health import Invoice
+from app.models.walks import Walk
+from app.services.uploads import StoredUpload, save_upload
+
+MEDIA_URL = "/media/"
+BLOB_DIR = "sha256"
+STAGING_DIR = ".staging"
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+def media_path(url: str) -> Path:
+    """Filesystem path of a /media/ URL."""
+    return Path(settings.MEDIA_ROOT) / url.removeprefix(MEDIA_URL)
+
+def is_blob_url(url: Optional[str]) -> bool:
+    return bool(url) and url.startswith(MEDIA_URL + BLOB_DIR + "/")
+
+def blob_url(sha256: str, ext: str) -> str:
+    return f"{MEDIA_URL}{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+class StoredMedia(NamedTuple):
+    url: str
+    size: int
+
+async def stage_upload(file: UploadFile, kind: str) -> StoredUpload:
+    """Stream an upload into the staging area, to validate before publishing."""
+    staging = Path(settings.MEDIA_ROOT) / STAGING_DIR / uuid.uuid4().hex
+    return await save_upload(file, staging, kind)
+
+def _publish(staged: Path, target: Path):
+    if target.exists():
+        # Same content already stored; refresh its age for the sweep
+        try:
+            os.utime(target)
+        except FileNotFoundError:
+            pass  # taken by a sweep since, store it again
+        else:
+            staged.unlink(missing_ok=True)
+            return
+    target.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staged, target)
+
+async def publish_upload(staged: StoredUpload, ext: str) -> StoredMedia:
+    """Move a staged upload to its content address."""
+    url = blob_url(staged.sha256, ext)
+    await run_in_threadpool(_publish, staged.path, media_path(url))
+    return StoredMedia(url, staged.size)
+
+async def discard_upload(staged: StoredUpload):
+    await run_in_threadpool(staged.path.unlink, missing_ok=True)
+
+async def store_upload(file: UploadFile, kind: str, ext: str) -> StoredMedia:
+    staged = await stage_upload(file, kind)
+    return await publish_upload(staged, ext)
+
+def _write_blob(data: bytes, target: Path):
+    staging = Path(settings.MEDIA_ROOT) / STAGING_DIR
+    staging.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=staging)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    _publish(Path(tmp), target)
+
+async def store_bytes(data: bytes, ext: str) -> StoredMedia:
+    """Store generated content, e.g. image renditions."""
+    url = blob_url(hashlib.sha256(data).hexdigest(), ext)
+    await run_in_threadpool(_write_blob, data, media_path(url))
+    return StoredMedia(url, len(data))
+
+async def acquire_media(db: AsyncSession, url: Optional[str], size: Optional[int] = None):
+    """Count a new reference to a blob, in the caller's transaction."""
+    if not is_blob_url(url):
+        return
+    now = datetime.now(timezone.utc)
+    stmt = insert(MediaBlob).values(path=url, size=size or 0, ref_count=1, updated_at=now)
+    await db.execute(stmt.on_conflict_do_update(
+        index_elements=[MediaBlob.path],
+        set_={"ref_count": MediaBlob.ref_count + 1, "updated_at": now}
+    ))
+
+async def release_media(db: AsyncSession, url: Optional[str]):
+    """Drop a reference; the file itself is removed by the sweep."""
+    if not is_blob_url(url):
+        return
+    await db.execute(
+        update(MediaBlob)
+        .where(MediaBlob.path == url)
+        .values(ref_count=func.greatest(MediaBlob.ref_count - 1, 0), updated_at=datetime.now(timezone.utc))
+    )
+
+async def replace_media(db: AsyncSession, old_url: Optional[str], new_url: Optional[str], size: Optional[int] = None):
+    if old_url == new_url:
+        return
+    await acquire_media(db, new_url, size)
+    await release_media(db, old_url)
+
+def _referenced_urls():
+    refs = union_all(
+        select(Dog.avatar_image_url.label("url")),
+        select(func.json_array_elements(Dog.avatar_renditions).op("->>")("url").label("url"))
+            .where(Dog.avatar_renditions != None),
+        select(Invoice.file_url.label("url")),
+        select(Walk.gpx_file_url.label("url")),
+    ).subquery()
+    return (
+        select(refs.c.url, func.count().label("refs"))
+        .where(refs.c.url.like(MEDIA_URL + BLOB_DIR + "/%"))
+        .group_by(refs.c.url)
+    )
+
+def _remove_files(paths, cutoff: float):
+    """Delete files not refreshed since `cutoff`.
+
+    Each file is moved aside before its age is checked, so a concurrent
+    `_publish` of the same content either refreshed it before the move, and
+    it is put back, or finds it gone and stores it again.
+    """
+    for path in paths:
+        aside = path.with_name(f".{path.name}.{uuid.uuid4().hex}.sweep")
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            continue
+        if aside.stat().st_mtime >= cutoff:
+            # Same content, so replacing a file stored meanwhile is harmless
+            os.replace(aside, path)
+        else:
+            aside.unlink()
+
+def _stale_files(root: Path, known: set, cutoff: float):
+    """Blob files without a media_blobs row, and abandoned staged uploads."""
+    stale = []
+    for directory in (root / BLOB_DIR, root / STAGING_DIR):
+        if not directory.is_dir():
+            continue
+        for path in directory.rglob("*"):
+            if not path.is_file() or path.stat().st_mtime >= cutoff:
+                continue
+            if directory.name == STAGING_DIR or MEDIA_URL + path.relative_to(root).as_posix() not in known:
+                stale.append(path)
+    return stale
+
+async def sweep_media(db: AsyncSession, grace: timedelta, dry_run: bool = False) -> List[Path]:
+    """Recount references and delete blobs unreferenced for longer than `grace`."""
+    now = datetime.now(timezone.utc)
+    refs = dict((await db.execute(_referenced_urls())).tuples().all())
+
+    # Referenced blobs stored before the refcount existed get their row now
+    for url, count in refs.items():
+        path = media_path(url)
+        size = path.stat().st_size if path.is_file() else 0
+        await db.execute(
+            insert(MediaBlob).values(path=url, size=size, ref_count=count, updated_at=now)
+            .on_conflict_do_update(index_elements=[MediaBlob.path], set_={"ref_count": count})
+        )
+    orphaned = update(MediaBlob).where(MediaBlob.ref_count != 0)
+    if refs:
+        orphaned = orphaned.where(MediaBlob.path.notin_(list(refs)))
+    await db.execute(orphaned.values(ref_count=0, updated_at=now))
+
+    cutoff = now - grace
+    known = set((await db.execute(select(MediaBlob.path))).scalars().all())
+    stale = await run_in_threadpool(_stale_files, Path(settings.MEDIA_ROOT), known, cutoff.timestamp())
+    # Re-checked at delete time, a handler may have taken a reference since
+    doomed = delete(MediaBlob).where(MediaBlob.ref_count == 0, MediaBlob.updated_at < cutoff)
+    if dry_run:
+        removed = (await db.execute(select(MediaBlob.path).where(doomed.whereclause))).scalars().all()
+        await db.rollback()
+    else:
+        removed = (await db.execute(doomed.returning(MediaBlob.path))).scalars().all()
+        await db.commit()
+    files = [media_path(url) for url in removed] + stale
+    if not dry_run:
+        await run_in_threadpool(_remove_files, files, cutoff.timestamp())
+    return files
@@ -0,0 +1,66 @@
+"""Check that the hot route queries can be served from indexes.
+
+`ACCESS_PATHS` builds the ownership-filtered lookups with the routers' own
+query functions, so the check follows the routes as they change. Each is
+EXPLAINed with sequential scans disabled, so on a small database the
+planner still picks an index when one exists. A remaining Seq Scan, or
+an index scan without an index condition (a full scan in index order),
+means the route has no index to use.
+"""
+import json
+from typing import Callable, Dict, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.routers import health, care, training, equipment, walks
+from app.services.transfer import dog_log_tags
+
+# Placeholder ids; plans do not depend on the values
+USER_ID = 1
+DOG_ID = 1
+
+ACCESS_PATHS: List[Tuple[str, Callable]] = [
+    ("GET /health/vet-visits", lambda: health.vet_visits_query(USER_ID)),
+    ("GET /health/vet-visits?dog_id=", lambda: health.vet_visits_query(USER_ID, DOG_ID)),
+    ("GET /health/vaccinations", lambda: health.vaccinations_query(USER_ID)),
+    ("GET /health/invoices", lambda: health.invoices_query(USER_ID)),
+    ("GET /health/invoices?dog_id=", lambda: health.invoices_query(USER_ID, DOG_ID)),
+    ("GET /care/tasks", lambda: care.care_tasks_query(USER_ID)),
+    ("GET /care/logs", lambda: care.care_logs_query(USER_ID)),
+    ("GET /care/logs?dog_id=", lambda: care.care_logs_query(USER_ID, DOG_ID)),
+    ("GET /training/goals", lambda: training.goals_query(USER_ID)),
+    ("GET /training/issues", lambda: training.issues_query(USER_ID)),
+    ("GET /training/logs", lambda: training.logs_query(USER_ID)),
+    ("PUT /training/goals/{id}", lambda: training.goal_log_ids_query(1)),
+    ("GET /equipment", lambda: equipment.equipment_query(USER_ID)),
+    ("GET /walks", lambda: walks.walks_query(USER_ID)),
+    ("GET /walks?dog_id=", lambda: walks.walks_query(USER_ID, DOG_ID)),
+    ("transfer-dog tags", lambda: dog_log_tags(DOG_ID)),
+]
+
+def full_scans(plan: Dict) -> List[str]:
+    """Relations read in full anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    found = []
+    node = plan.get("Node Type")
+    if node == "Seq Scan" or (node in ("Index Scan", "Index Only Scan") and "Index Cond" not in plan):
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", ()):
+        found.extend(full_scans(child))
+    return found
+
+async def explain(db: AsyncSession, stmt) -> Dict:
+    sql = stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    await db.execute(text("SET LOCAL enable_seqscan = off"))
+    result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+async def verify_access_paths(db: AsyncSession) -> List[Tuple[str, List[str]]]:
+    """(route, fully scanned tables) per access path, in order."""
+    results = []
+    for name, build in ACCESS_PATHS:
+        results.append((name, full_scans(await explain(db, build()))))
+    await db.rollback()
+    return results
@@ -0,0 +1,193 @@
+"""Recurrence rules for care tasks.
+
+A task recurs either by its `interval_type` (DAILY, WEEKLY, MONTHLY,
+CUSTOM_DAYS) or by an RRULE-style string in `rrule`, e.g.
+"FREQ=WEEKLY;INTERVAL=2;BYDAY=MO,TH" or "FREQ=MONTHLY;BYMONTHDAY=1,-1;COUNT=12".
+
+Supported RRULE parts: FREQ (DAILY, WEEKLY, MONTHLY), INTERVAL, BYDAY
+(plain weekdays), BYMONTHDAY (negative counts from the month end), COUNT
+and UNTIL. Like the rest of the app, month days past the end of a month are
+clamped to its last day instead of being skipped.
+
+Occurrences are counted from an anchor date. For RRULE tasks that is the
+series start `dtstart`, fixed when the rule is saved, so COUNT and
+month-end days hold across completions; interval tasks restart from each
+completion. Expansion is lazy and vectorized: batches of periods are
+turned into dates with numpy date arithmetic. Expansion into a
+[start, end] range jumps straight to the first period overlapping `start`,
+so far-future windows cost no more than near ones.
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Iterator, Optional, Tuple
+import numpy as np
+from app.models.care import IntervalType
+
+DAILY = "DAILY"
+WEEKLY = "WEEKLY"
+MONTHLY = "MONTHLY"
+
+WEEKDAYS = ["MO", "TU", "WE", "TH", "FR", "SA", "SU"]
+
+# Periods expanded per batch, doubling up to the maximum
+FIRST_BATCH_PERIODS = 16
+MAX_BATCH_PERIODS = 1024
+
+@dataclass(frozen=True)
+class Recurrence:
+    freq: str
+    interval: int = 1
+    by_weekday: Tuple[int, ...] = ()
+    by_monthday: Tuple[int, ...] = ()
+    count: Optional[int] = None
+    until: Optional[date] = None
+
+def parse_rrule(text: str) -> Recurrence:
+    """Parse an RRULE string, raising ValueError on anything unsupported."""
+    parts = {}
+    for item in text.strip().removeprefix("RRULE:").split(";"):
+        if not item:
+            continue
+        key, sep, value = item.partition("=")
+        if not sep:
+            raise ValueError(f"Malformed rule part: {item}")
+        parts[key.strip().upper()] = value.strip().upper()
+
+    freq = parts.pop("FREQ", None)
+    if freq not in (DAILY, WEEKLY, MONTHLY):
+        raise ValueError("FREQ must be DAILY, WEEKLY or MONTHLY")
+    interval = int(parts.pop("INTERVAL", "1"))
+    if interval < 1:
+        raise ValueError("INTERVAL must be positive")
+
+    by_weekday = ()
+    if "BYDAY" in parts:
+        try:
+            by_weekday = tuple(sorted({WEEKDAYS.index(day) for day in parts.pop("BYDAY").split(",")}))
+        except ValueError:
+            raise ValueError("BYDAY only supports plain weekdays (MO..SU)")
+
+    by_monthday = ()
+    if "BYMONTHDAY" in parts:
+        by_monthday = tuple(sorted({int(day) for day in parts.pop("BYMONTHDAY").split(",")}))
+        if any(day == 0 or not -31 <= day <= 31 for day in by_monthday):
+            raise ValueError("BYMONTHDAY must be between -31 and 31 and not 0")
+        if freq != MONTHLY:
+            raise ValueError("BYMONTHDAY requires FREQ=MONTHLY")
+
+    count = int(parts.pop("COUNT")) if "COUNT" in parts else None
+    if count is not None and count < 1:
+        raise ValueError("COUNT must be positive")
+    until = None
+    if "UNTIL" in parts:
+        raw = parts.pop("UNTIL")[:8]
+        until = date(int(raw[:4]), int(raw[4:6]), int(raw[6:8]))
+
+    if parts:
+        raise ValueError(f"Unsupported rule parts: {', '.join(sorted(parts))}")
+    return Recurrence(freq, interval, by_weekday, by_monthday, count, until)
+
+def task_recurrence(task) -> Recurrence:
+    if task.rrule:
+        return parse_rrule(task.rrule)
+    if task.interval_type == IntervalType.DAILY:
+        return Recurrence(DAILY)
+    if task.interval_type == IntervalType.WEEKLY:
+        return Recurrence(WEEKLY)
+    if task.interval_type == IntervalType.MONTHLY:
+        return Recurrence(MONTHLY)
+    return Recurrence(DAILY, interval=task.interval_days or 1)
+
+def _first_period(rule: Recurrence, anchor: date, start: date) -> int:
+    """Index of the first period that can contain dates >= start."""
+    if rule.count is not None or start <= anchor:
+        # COUNT needs every occurrence from the anchor on; it also bounds the work
+        return 0
+    if rule.freq == DAILY:
+        return (start - anchor).days // rule.interval
+    if rule.freq == WEEKLY:
+        weeks = ((start - timedelta(days=start.weekday())) - (anchor - timedelta(days=anchor.weekday()))).days // 7
+        return weeks // rule.interval
+    months = (start.year - anchor.year) * 12 + (start.month - anchor.month)
+    return months // rule.interval
+
+def _weekdays(days: np.ndarray) -> np.ndarray:
+    # 1970-01-01 was a Thursday
+    return (days.astype(np.int64) + 3) % 7
+
+def _period_dates(rule: Recurrence, anchor: date, periods: np.ndarray) -> np.ndarray:
+    """Sorted datetime64[D] dates of the given consecutive periods."""
+    steps = periods * rule.interval
+    start = np.datetime64(anchor, "D")
+    if rule.freq == DAILY:
+        days = start + steps
+        if rule.by_weekday:
+            days = days[np.isin(_weekdays(days), rule.by_weekday)]
+        return days
+    if rule.freq == WEEKLY:
+        if not rule.by_weekday:
+            return start + steps * 7
+        monday = start - anchor.weekday()
+        return (monday + steps[:, None] * 7 + np.array(rule.by_weekday)).ravel()
+    months = np.datetime64(anchor, "M") + steps
+    first = months.astype("datetime64[D]")
+    last = ((months + 1).astype("datetime64[D]") - first).astype(np.int64)[:, None]
+    month_days = np.array(rule.by_monthday or (anchor.day,))
+    day = np.clip(np.where(month_days < 0, last + 1 + month_days, month_days), 1, last)
+    return np.unique(first[:, None] + (day - 1))
+
+def occurrences(rule: Recurrence, anchor: date, start: Optional[date] = None, end: Optional[date] = None) -> Iterator[date]:
+    """Lazily yield the occurrences of `rule` from `anchor` within [start, end]."""
+    start = start or anchor
+    first_day = np.datetime64(anchor, "D")
+    start_day = np.datetime64(start, "D")
+    limits = [np.datetime64(limit, "D") for limit in (rule.until, end) if limit is not None]
+    k = _first_period(rule, anchor, start)
+    batch = FIRST_BATCH_PERIODS
+    emitted = 0
+    while True:
+        days = _period_dates(rule, anchor, np.arange(k, k + batch))
+        if not days.size:
+            # DAILY+BYDAY repeats its weekday pattern every 7 periods
+            return
+        days = days[days >= first_day]
+        done = False
+        for limit in limits:
+            if days.size and days[-1] > limit:
+                days = days[days <= limit]
+                done = True
+        if rule.count is not None and emitted + days.size >= rule.count:
+            days = days[:rule.count - emitted]
+            done = True
+        emitted += days.size
+        yield from days[days >= start_day].tolist()
+        if done:
+            return
+        k += batch
+        batch = min(batch * 2, MAX_BATCH_PERIODS)
+
+def next_occurrence(rule: Recurrence, anchor: date, after: date) -> Optional[date]:
+    """First occurrence strictly after `after`, None once the rule is exhausted."""
+    return next(occurrences(rule, anchor, start=after + timedelta(days=1)), None)
+
+def series_start(task) -> date:
+    """Anchor the task's occurrences are expanded from."""
+    if task.rrule and task.dtstart is not None:
+        return task.dtstart
+    return task.next_due_date
+
+def task_occurrences(task, start: date, end: date) -> Iterator[date]:
+    """Open occurrences of a task within [start, end], from its current due date on."""
+    return occurrences(task_recurrence(task), series_start(task), max(start, task.next_due_date), end)
+
+def next_due_date(task, completed_on: date) -> Optional[date]:
+    """Due date of a task after it was completed on `completed_on`.
+
+    Interval tasks restart from the completion day (one interval later).
+    RRULE tasks stay on their calendar and move to the first occurrence
+    after both the completion and the occurrence just completed.
+    """
+    rule = task_recurrence(task)
+    if not task.rrule:
+        return next_occurrence(rule, completed_on, completed_on)
+    return next_occurrence(rule, series_start(task), max(completed_on, task.next_due_date))
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Set
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, union_all, literal, delete, String
+from sqlalchemy.dialects.postgresql import insert
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.user import User
+from app.models.dogs import Dog
+from app.models.care import CareTask
+from app.models.health import Vaccination, VetVisit
+from app.models.reminders import ReminderEntry, ReminderCacheState
+
+logger = logging.getLogger(__name__)
+
+CARE_TASK = "CARE_TASK"
+VACCINATION = "VACCINATION"
+VET_VISIT = "VET_VISIT"
+
+# Expired vaccinations older than this are not worth reminding about
+VACCINATION_LOOKBACK = timedelta(days=365)
+
+def reminder_query(user_id: int, today: date, limit_date: date):
+    """All three reminder kinds for one user as a single query, sorted by date.
+
+    Rows are (type, id, date, title, dog_name); `is_overdue` is left to the
+    caller because it only depends on `today`.
+    """
+    tasks = (
+        select(
+            literal(CARE_TASK, String).label("type"),
+            CareTask.id.label("id"),
+            CareTask.next_due_date.label("date"),
+            ("Care: " + CareTask.title).label("title"),
+            Dog.name.label("dog_name"),
+        )
+        .join(Dog, Dog.id == CareTask.dog_id)
+        .where(
+            Dog.owner_user_id == user_id,
+            CareTask.is_active == True,
+            CareTask.next_due_date <= limit_date,
+        )
+    )
+    vaccinations = (
+        select(
+            literal(VACCINATION, String).label("type"),
+            Vaccination.id.label("id"),
+            Vaccination.valid_until.label("date"),
+            ("Vaccine Expiring: " + Vaccination.vaccine_type).label("title"),
+            Dog.name.label("dog_name"),
+        )
+        .join(Dog, Dog.id == Vaccination.dog_id)
+        .where(
+            Dog.owner_user_id == user_id,
+            Vaccination.valid_until <= limit_date,
+            Vaccination.valid_until >= today - VACCINATION_LOOKBACK,
+        )
+    )
+    visits = (
+        select(
+            literal(VET_VISIT, String).label("type"),
+            VetVisit.id.label("id"),
+            VetVisit.date.label("date"),
+            ("Vet Visit: " + VetVisit.reason).label("title"),
+            Dog.name.label("dog_name"),
+        )
+        .join(Dog, Dog.id == VetVisit.dog_id)
+        .where(
+            Dog.owner_user_id == user_id,
+            VetVisit.date >= today,
+            VetVisit.date <= limit_date,
+        )
+    )
+    reminders = union_all(tasks, vaccinations, visits).subquery()
+    return select(reminders).order_by(reminders.c.date, reminders.c.type, reminders.c.id)
+
+async def refresh_user_reminders(db: AsyncSession, user_id: int, today: date) -> ReminderCacheState:
+    """Recompute the cached reminder window of one user and record the diff.
+
+    Only entries whose content changed get a new `updated_at`, entries that
+    left the window become tombstones. The caller commits.
+    """
+    now = datetime.now(timezone.utc)
+    limit_date = today + timedelta(days=settings.REMINDER_HORIZON_DAYS)
+
+    # Created if missing and locked first, so concurrent refreshes of one
+    # user (e.g. two first requests) wait for each other instead of both
+    # inserting the state row or bumping the version for the same diff
+    await db.execute(
+        insert(ReminderCacheState)
+        .values(user_id=user_id, computed_on=today, version=0, changed_at=now)
+        .on_conflict_do_nothing(index_elements=[ReminderCacheState.user_id])
+    )
+    state = (await db.execute(
+        select(ReminderCacheState)
+        .where(ReminderCacheState.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )).scalar_one()
+
+    live = await db.execute(reminder_query(user_id, today, limit_date))
+    live = {(row.type, row.id): row for row in live}
+    cached = await db.execute(select(ReminderEntry).where(ReminderEntry.user_id == user_id))
+    cached = {(entry.type, entry.entity_id): entry for entry in cached.scalars().all()}
+
+    changed = []
+    for key, row in live.items():
+        entry = cached.get(key)
+        if (entry is None or entry.is_deleted or entry.date != row.date
+                or entry.title != row.title or entry.dog_name != row.dog_name):
+            changed.append(dict(
+                user_id=user_id, type=row.type, entity_id=row.id, date=row.date,
+                title=row.title, dog_name=row.dog_name, is_deleted=False, updated_at=now,
+            ))
+    for key, entry in cached.items():
+        if key not in live and not entry.is_deleted:
+            changed.append(dict(
+                user_id=user_id, type=entry.type, entity_id=entry.entity_id, date=entry.date,
+                title=entry.title, dog_name=entry.dog_name, is_deleted=True, updated_at=now,
+            ))
+
+    if changed:
+        stmt = insert(ReminderEntry).values(changed)
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[ReminderEntry.user_id, ReminderEntry.type, ReminderEntry.entity_id],
+            set_={col: stmt.excluded[col] for col in ("date", "title", "dog_name", "is_deleted", "updated_at")},
+        ))
+    await db.execute(delete(ReminderEntry).where(
+        ReminderEntry.user_id == user_id,
+        ReminderEntry.is_deleted == True,
+        ReminderEntry.updated_at < now - timedelta(days=settings.REMINDER_TOMBSTONE_DAYS),
+    ))
+
+    state.computed_on = today
+    if changed:
+        state.version += 1
+        state.changed_at = now
+    await db.flush()
+    return state
+
+class ReminderScheduler:
+    """In-process background refresher for the reminder cache.
+
+    Every user is refreshed when the date rolls over, users marked dirty by a
+    write are refreshed as soon as the loop wakes up. Readers call
+    `ensure_fresh` so they never see a stale window either way.
+    """
+
+    def __init__(self):
+        self._dirty: Set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._computed_on: Optional[date] = None
+
+    def mark_dirty(self, user_id: int):
+        self._dirty.add(user_id)
+        self._wakeup.set()
+
+    async def ensure_fresh(self, db: AsyncSession, user_id: int) -> ReminderCacheState:
+        today = date.today()
+        state = await db.get(ReminderCacheState, user_id)
+        if state is None or state.computed_on != today or user_id in self._dirty:
+            self._dirty.discard(user_id)
+            state = await refresh_user_reminders(db, user_id, today)
+            await db.commit()
+        return state
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh(self, user_ids, today: date):
+        for user_id in user_ids:
+            try:
+                async with AsyncSessionLocal() as db:
+                    await refresh_user_reminders(db, user_id, today)
+                    await db.commit()
+            except Exception:
+                logger.exception("Reminder refresh failed for user %s", user_id)
+
+    async def _run(self):
+        while True:
+            today = date.today()
+            if self._computed_on != today:
+                try:
+                    async with AsyncSessionLocal() as db:
+                        user_ids = (await db.execute(select(User.id))).scalars().all()
+                    await self._refresh(user_ids, today)
+                    self._computed_on = today
+                except Exception:
+                    logger.exception("Daily reminder refresh failed")
+            if self._dirty:
+                user_ids, self._dirty = self._dirty, set()
+                await self._refresh(user_ids, today)
+
+            # Sleep until the next write or midnight, whichever comes first
+            midnight = datetime.combine(today + timedelta(days=1), time.min)
+            timeout = max(1.0, min(60.0, (midnight - datetime.now()).total_seconds()))
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+reminder_scheduler = ReminderScheduler()
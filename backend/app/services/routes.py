@@ -0,0 +1,93 @@
+"""Route geometry helpers: simplification and compact encodings."""
+import math
+from collections import OrderedDict
+from typing import Hashable, Optional
+import numpy as np
+
+EARTH_RADIUS_M = 6371008.8
+
+# Ground resolution of one 256px web map tile pixel at the equator, zoom 0
+METERS_PER_PIXEL_Z0 = 156543.03392
+
+def zoom_tolerance_m(zoom: int, latitude: float) -> float:
+    """Simplification tolerance of one screen pixel at the given zoom level."""
+    return METERS_PER_PIXEL_Z0 * math.cos(math.radians(latitude)) / (2 ** zoom)
+
+def project_m(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Local equirectangular projection to meters, good enough for tolerances."""
+    lat0 = math.radians(float(lat.mean())) if len(lat) else 0.0
+    x = np.radians(lon) * EARTH_RADIUS_M * math.cos(lat0)
+    y = np.radians(lat) * EARTH_RADIUS_M
+    return np.column_stack((x, y))
+
+def simplify_mask(xy: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas-Peucker over an (n, 2) array, returning a keep-mask.
+
+    Iterative, and each split computes the distances of its whole span in
+    one vectorized step, so long tracks stay fast and recursion-free.
+    """
+    n = len(xy)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    if n < 3 or tolerance <= 0:
+        keep[:] = True
+        return keep
+
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        start, end = xy[first], xy[last]
+        points = xy[first + 1:last]
+        segment = end - start
+        length = math.hypot(segment[0], segment[1])
+        if length == 0:
+            distances = np.hypot(points[:, 0] - start[0], points[:, 1] - start[1])
+        else:
+            distances = np.abs(segment[0] * (points[:, 1] - start[1]) - segment[1] * (points[:, 0] - start[0])) / length
+        index = int(np.argmax(distances))
+        if distances[index] > tolerance:
+            split = first + 1 + index
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+def encode_polyline(lat: np.ndarray, lon: np.ndarray, precision: int = 5) -> str:
+    """Google encoded polyline of the given coordinates."""
+    factor = 10 ** precision
+    coords = np.column_stack((np.round(lat * factor), np.round(lon * factor))).astype(np.int64)
+    deltas = np.diff(coords, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).ravel()
+
+    chunks = []
+    for value in deltas.tolist():
+        value = ~(value << 1) if value < 0 else value << 1
+        while value >= 0x20:
+            chunks.append(chr((0x20 | (value & 0x1F)) + 63))
+            value >>= 5
+        chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+class LRUCache:
+    """Small in-process LRU cache for derived, recomputable data."""
+
+    def __init__(self, max_entries: int):
+        self._entries: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+
+    def get(self, key: Hashable) -> Optional[object]:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: object):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+route_cache = LRUCache(max_entries=1024)
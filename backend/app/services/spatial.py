@@ -0,0 +1,109 @@
+"""Grid-cell spatial index for walk routes.
+
+Every walk stores the set of CELL_DEG x CELL_DEG grid cells its track
+passes through (`walk_cells`). Area queries look up candidate walks by
+cell, or by bounding box for areas too large for a cell lookup, and are
+then confirmed against the stored track, segments included, so a sparse
+track crossing a small area between two points still matches.
+"""
+import math
+from typing import List, Tuple
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, distinct
+from app.models.walks import Walk, WalkCell
+
+CELL_DEG = 0.01
+
+# Above this many cells an area query prunes by walk bounding boxes instead
+MAX_QUERY_CELLS = 2500
+
+METERS_PER_DEG_LAT = 111320.0
+
+def _cell(value):
+    return np.floor(np.asarray(value) / CELL_DEG).astype(np.int64)
+
+def track_cells(lat: np.ndarray, lon: np.ndarray) -> List[Tuple[int, int]]:
+    """Unique (cell_x, cell_y) pairs covered by a track.
+
+    Segments are densified to half a cell so long straight jumps between
+    sparse points do not skip the cells in between.
+    """
+    if len(lat) > 1:
+        steps = np.maximum(1, np.ceil(np.maximum(np.abs(np.diff(lat)), np.abs(np.diff(lon))) / (CELL_DEG / 2)).astype(np.int64))
+        starts = np.repeat(np.arange(len(steps)), steps)
+        offsets = np.arange(len(starts)) - np.repeat(np.cumsum(steps) - steps, steps)
+        fraction = offsets / np.repeat(steps, steps)
+        lat = np.concatenate((lat[starts] + (lat[starts + 1] - lat[starts]) * fraction, lat[-1:]))
+        lon = np.concatenate((lon[starts] + (lon[starts + 1] - lon[starts]) * fraction, lon[-1:]))
+    cells = np.unique(np.column_stack((_cell(lon), _cell(lat))), axis=0)
+    return [(int(x), int(y)) for x, y in cells]
+
+def radius_bbox(lat: float, lon: float, radius_m: float) -> Tuple[float, float, float, float]:
+    """(min_lat, min_lon, max_lat, max_lon) enclosing a circle."""
+    d_lat = radius_m / METERS_PER_DEG_LAT
+    d_lon = radius_m / (METERS_PER_DEG_LAT * max(math.cos(math.radians(lat)), 1e-6))
+    return lat - d_lat, lon - d_lon, lat + d_lat, lon + d_lon
+
+async def candidate_walk_ids(db: AsyncSession, user_id: int, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+    """Walks of the user that may pass through the box, from the index only."""
+    x0, x1 = int(_cell(min_lon)), int(_cell(max_lon))
+    y0, y1 = int(_cell(min_lat)), int(_cell(max_lat))
+    if (x1 - x0 + 1) * (y1 - y0 + 1) <= MAX_QUERY_CELLS:
+        query = select(distinct(WalkCell.walk_id)).where(
+            WalkCell.user_id == user_id,
+            WalkCell.cell_y.between(y0, y1),
+            WalkCell.cell_x.between(x0, x1)
+        )
+    else:
+        query = select(Walk.id).where(
+            Walk.user_id == user_id,
+            Walk.max_lat >= min_lat,
+            Walk.min_lat <= max_lat,
+            Walk.max_lon >= min_lon,
+            Walk.min_lon <= max_lon
+        )
+    result = await db.execute(query)
+    return list(result.scalars().all())
+
+def _segments(points: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """(lat0, lon0, lat1, lon1) of every segment; a single point is one empty segment."""
+    lat, lon = points["lat"], points["lon"]
+    if len(lat) == 1:
+        return lat, lon, lat, lon
+    return lat[:-1], lon[:-1], lat[1:], lon[1:]
+
+def track_in_box(points: np.ndarray, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> bool:
+    """Whether any segment of the track enters the box (Liang-Barsky)."""
+    if len(points) == 0:
+        return False
+    lat0, lon0, lat1, lon1 = _segments(points)
+    enter = np.zeros(len(lat0))
+    leave = np.ones(len(lat0))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for start, end, low, high in ((lat0, lat1, min_lat, max_lat), (lon0, lon1, min_lon, max_lon)):
+            delta = end - start
+            t_low = (low - start) / delta
+            t_high = (high - start) / delta
+            parallel = delta == 0
+            inside = (start >= low) & (start <= high)
+            enter = np.maximum(enter, np.where(parallel, np.where(inside, 0.0, np.inf), np.minimum(t_low, t_high)))
+            leave = np.minimum(leave, np.where(parallel, np.where(inside, 1.0, -np.inf), np.maximum(t_low, t_high)))
+    return bool(np.any(enter <= leave))
+
+def track_near(points: np.ndarray, lat: float, lon: float, radius_m: float) -> bool:
+    """Whether any segment of the track passes within `radius_m` of a point.
+
+    Distances are planar around the point, which is accurate to well under
+    a percent at search radii.
+    """
+    if len(points) == 0:
+        return False
+    lat0, lon0, lat1, lon1 = _segments(points)
+    x_scale = METERS_PER_DEG_LAT * math.cos(math.radians(lat))
+    x0, y0 = (lon0 - lon) * x_scale, (lat0 - lat) * METERS_PER_DEG_LAT
+    dx, dy = (lon1 - lon0) * x_scale, (lat1 - lat0) * METERS_PER_DEG_LAT
+    length2 = dx * dx + dy * dy
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.clip(np.where(length2 > 0, -(x0 * dx + y0 * dy) / length2, 0.0), 0.0, 1.0)
+    return bool(np.any(np.hypot(x0 + t * dx, y0 + t * dy) <= radius_m))
@@ -0,0 +1,226 @@
+"""Serving of the /media mount.
+
+Adds what the plain StaticFiles lacks for PDFs and large GPX files:
+single byte ranges (with If-Range), strong ETags with If-None-Match and
+If-Modified-Since, precompressed `.br`/`.gz` siblings picked by
+Accept-Encoding, and zero-copy sends through the ASGI
+`http.response.zerocopysend` extension when the server offers it.
+"""
+import mimetypes
+import os
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional, Tuple
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+from app.services.media import BLOB_DIR, IMMUTABLE_CACHE_CONTROL
+
+CHUNK_SIZE = 256 * 1024
+
+# Below this size a plain read is as cheap as a zero-copy send
+ZEROCOPY_MIN_BYTES = 64 * 1024
+
+# Preferred first
+PRECOMPRESSED = (("br", ".br"), ("gzip", ".gz"))
+
+def _quality(params: str) -> float:
+    for param in params.split(";"):
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 1.0
+    return 1.0
+
+def accepts_encoding(accept_encoding: str, coding: str) -> bool:
+    """Whether Accept-Encoding allows `coding`; an explicit entry overrides `*`."""
+    wildcard = None
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        if name == coding:
+            return _quality(params) > 0
+        if name == "*":
+            wildcard = _quality(params) > 0
+    return bool(wildcard)
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+def parse_range(value: str, size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive (start, end) of a single "bytes=" range.
+
+    Returns None for ranges to ignore (multiple ranges, other units, bad
+    syntax), which are answered with the full file, and raises
+    RangeNotSatisfiable when the range lies outside the file.
+    """
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = (part.strip() for part in spec.partition("-"))
+    if not sep or not (first or last) or not all(part.isdigit() for part in (first, last) if part):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and start > end:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end, size - 1)
+
+def etag_matches(header: str, etag: str) -> bool:
+    # Weak comparison, as If-None-Match requires
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+class MediaFileResponse(Response):
+    """File response that evaluates conditional and range headers itself."""
+
+    def __init__(self, path: str, stat_result: os.stat_result, media_type: Optional[str],
+                 etag: str, content_encoding: Optional[str] = None):
+        self.path = path
+        self.size = stat_result.st_size
+        self.mtime = stat_result.st_mtime
+        self.status_code = 200
+        self.background = None
+        self.media_type = media_type or "application/octet-stream"
+        headers = {
+            "content-type": self.media_type,
+            "etag": etag,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+            "vary": "Accept-Encoding",
+        }
+        if content_encoding:
+            headers["content-encoding"] = content_encoding
+        self.init_headers(headers)
+
+    def _not_modified(self, request: Headers) -> bool:
+        if_none_match = request.get("if-none-match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, self.headers["etag"])
+        if_modified_since = request.get("if-modified-since")
+        if if_modified_since:
+            try:
+                return int(self.mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def _range_applies(self, request: Headers) -> bool:
+        if_range = request.get("if-range")
+        if if_range is None:
+            return True
+        # Strong comparison only; a date must match exactly
+        return if_range.strip() == self.headers["etag"] or if_range.strip() == self.headers["last-modified"]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        request = Headers(scope=scope)
+        headers = self.headers.mutablecopy()
+        status_code, start, end = 200, 0, self.size - 1
+
+        if self._not_modified(request):
+            for name in ("content-type", "content-encoding", "accept-ranges"):
+                del headers[name]
+            await send({"type": "http.response.start", "status": 304, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if "range" in request and scope["method"] == "GET" and self._range_applies(request):
+            try:
+                byte_range = parse_range(request["range"], self.size)
+            except RangeNotSatisfiable:
+                headers["content-range"] = f"bytes */{self.size}"
+                headers["content-length"] = "0"
+                await send({"type": "http.response.start", "status": 416, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            if byte_range is not None:
+                status_code, (start, end) = 206, byte_range
+                headers["content-range"] = f"bytes {start}-{end}/{self.size}"
+
+        count = end - start + 1 if self.size else 0
+        headers["content-length"] = str(count)
+        self.status_code = status_code
+        await send({"type": "http.response.start", "status": status_code, "headers": headers.raw})
+        if scope["method"] == "HEAD" or count == 0:
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        zerocopy = "http.response.zerocopysend" in scope.get("extensions", {}) and count >= ZEROCOPY_MIN_BYTES
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if zerocopy:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.wrapped,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+                return
+            await file.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+            if remaining > 0:
+                # File shrank underneath us; end the response rather than hang
+                await send({"type": "http.response.body", "body": b""})
+
+class MediaFiles(StaticFiles):
+    """The /media mount. Blobs are served as immutable and dot-directories
+    such as the staging area are not served at all."""
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if any(part.startswith(".") for part in Path(path).parts):
+            raise HTTPException(status_code=404)
+
+        response = None
+        accept_encoding = Headers(scope=scope).get("accept-encoding", "")
+        if scope["method"] in ("GET", "HEAD") and accept_encoding:
+            for coding, suffix in PRECOMPRESSED:
+                if not accepts_encoding(accept_encoding, coding):
+                    continue
+                full_path, stat_result = await anyio.to_thread.run_sync(self.lookup_path, path + suffix)
+                if stat_result and stat.S_ISREG(stat_result.st_mode):
+                    media_type = mimetypes.guess_type(path)[0]
+                    response = self.file_response(full_path, stat_result, scope,
+                                                  media_type=media_type, content_encoding=coding)
+                    break
+        if response is None:
+            response = await super().get_response(path, scope)
+
+        if path.startswith(BLOB_DIR + "/"):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        return response
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200,
+                      media_type: Optional[str] = None, content_encoding: Optional[str] = None) -> Response:
+        name = os.path.basename(full_path)
+        stem = name.split(".", 1)[0]
+        if len(stem) == 64 and Path(full_path).parent.parent.parent.name == BLOB_DIR:
+            # Content-addressed: the file name is the content hash
+            tag = stem
+        else:
+            tag = f"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"
+        if content_encoding:
+            tag += "-" + content_encoding
+        if media_type is None:
+            media_type = mimetypes.guess_type(name)[0]
+        return MediaFileResponse(str(full_path), stat_result, media_type, f'"{tag}"', content_encoding)
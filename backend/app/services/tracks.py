@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, insert
+from app.models.walks import Walk, WalkTrack, WalkCell
+from app.services.gpx import IngestedTrack
+from app.services.spatial import track_cells
+from app.services.walk_stats import walk_stat_keys, sync_walk_stats
+
+async def save_walk_track(db: AsyncSession, walk: Walk, ingested: IngestedTrack):
+    """Store a freshly ingested track with its stats and spatial index rows."""
+    for key, value in ingested.stats.items():
+        setattr(walk, key, value)
+    await db.flush()
+    await sync_walk_stats(db, await walk_stat_keys(db, [walk.id]))
+
+    track = await db.get(WalkTrack, walk.id)
+    if track is None:
+        track = WalkTrack(walk_id=walk.id)
+        db.add(track)
+    track.point_count = len(ingested.points)
+    track.data = ingested.data
+    track.updated_at = datetime.now(timezone.utc)
+
+    await index_walk_track(db, walk, ingested.points)
+
+async def index_walk_track(db: AsyncSession, walk: Walk, points: np.ndarray):
+    """Replace the spatial index rows of a walk."""
+    await db.execute(delete(WalkCell).where(WalkCell.walk_id == walk.id))
+    cells = track_cells(points["lat"], points["lon"])
+    if cells:
+        await db.execute(insert(WalkCell), [
+            dict(walk_id=walk.id, user_id=walk.user_id, cell_x=x, cell_y=y) for x, y in cells
+        ])
+
+async def delete_walk_track(db: AsyncSession, walk: Walk):
+    """Remove index rows of a walk, call before deleting the walk itself."""
+    await db.execute(delete(WalkCell).where(WalkCell.walk_id == walk.id))
@@ -0,0 +1,55 @@
+"""Moving a dog, and everything recorded about it, to another user.
+
+The dog-owned tables carry a copy of the dog's `owner_user_id` so that
+ownership filters are single-table lookups; `transfer_dog` is the one place
+besides inserts that writes it, and keeps all copies in step.
+"""
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.dogs import Dog
+from app.models.health import VetVisit, Vaccination, Invoice
+from app.models.care import CareTask, CareTaskLog
+from app.models.training import TrainingGoal, BehaviorIssue, TrainingLog
+from app.models.equipment import EquipmentItem
+from app.models.tags import TagAssignment
+from app.services.activity import dog_activity_ids, sync_dog_activity
+
+# Tables with both dog_id and owner_user_id
+DOG_OWNED = [VetVisit, Vaccination, CareTask, TrainingGoal, BehaviorIssue, TrainingLog, EquipmentItem]
+
+def dog_log_tags(dog_id: int):
+    """Tag assignments on a dog's training logs."""
+    log_ids = select(TrainingLog.id).where(TrainingLog.dog_id == dog_id)
+    return delete(TagAssignment).where(TagAssignment.entity_type == "TRAINING_LOG", TagAssignment.entity_id.in_(log_ids))
+
+async def transfer_dog(db: AsyncSession, dog: Dog, new_owner_user_id: int):
+    """Reassign a dog within the caller's transaction.
+
+    Walks stay with the user who recorded them. Tags are per user, so the
+    previous owner's tags are removed from the dog's training logs.
+    """
+    if dog.owner_user_id == new_owner_user_id:
+        return
+    # Waits for creates that checked the old owner (require_dog locks the
+    # dog FOR SHARE) and keeps new ones out until the copies are updated
+    await db.execute(select(Dog.id).where(Dog.id == dog.id).with_for_update())
+    for model in DOG_OWNED:
+        await db.execute(
+            update(model).where(model.dog_id == dog.id).values(owner_user_id=new_owner_user_id)
+        )
+    task_ids = select(CareTask.id).where(CareTask.dog_id == dog.id)
+    await db.execute(
+        update(CareTaskLog).where(CareTaskLog.care_task_id.in_(task_ids)).values(owner_user_id=new_owner_user_id)
+    )
+    visit_ids = select(VetVisit.id).where(VetVisit.dog_id == dog.id)
+    await db.execute(
+        update(Invoice)
+        .where((Invoice.dog_id == dog.id) | Invoice.vet_visit_id.in_(visit_ids))
+        .values(owner_user_id=new_owner_user_id)
+    )
+    await db.execute(dog_log_tags(dog.id))
+
+    dog.owner_user_id = new_owner_user_id
+    await db.flush()
+    # Feed rows take the user from the dog
+    await sync_dog_activity(db, await dog_activity_ids(db, dog.id))
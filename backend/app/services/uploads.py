@@ -0,0 +1,137 @@
+"""Streaming upload storage shared by the GPX, avatar and invoice uploads.
+
+Uploads are copied in chunks to a temp file next to their destination,
+with file I/O and hashing on the thread pool so the event loop keeps
+serving other requests. The size limit is enforced while streaming and
+the finished file is renamed into place atomically, so readers never see
+a partial file.
+
+By the time a handler runs, the multipart parser has already spooled the
+whole request body, so `UploadLimitMiddleware` caps the body of the upload
+routes before parsing: on Content-Length up front, and on the bytes
+actually received for chunked requests.
+"""
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import BinaryIO, List, NamedTuple, Optional, Pattern, Tuple
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.config import settings
+
+CHUNK_SIZE = 1024 * 1024
+
+GPX = "gpx"
+AVATAR = "avatar"
+INVOICE = "invoice"
+
+# Multipart boundaries, part headers and other form fields on top of the file
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+def max_upload_bytes(kind: str) -> int:
+    return {
+        GPX: settings.MAX_GPX_UPLOAD_BYTES,
+        AVATAR: settings.MAX_AVATAR_UPLOAD_BYTES,
+        INVOICE: settings.MAX_INVOICE_UPLOAD_BYTES,
+    }[kind]
+
+class StoredUpload(NamedTuple):
+    path: Path
+    size: int
+    sha256: str
+
+def _too_large_detail(limit: int) -> str:
+    return f"File too large (limit {limit // (1024 * 1024)} MB)"
+
+def _too_large(limit: int) -> HTTPException:
+    return HTTPException(status_code=413, detail=_too_large_detail(limit))
+
+def _write_chunk(out: BinaryIO, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+def _open_temp(directory: Path):
+    directory.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".upload-")
+    return os.fdopen(fd, "wb"), Path(tmp)
+
+def _discard(out: BinaryIO, tmp: Path):
+    out.close()
+    tmp.unlink(missing_ok=True)
+
+def _finish(out: BinaryIO, tmp: Path, destination: Path):
+    out.flush()
+    os.fsync(out.fileno())
+    out.close()
+    os.replace(tmp, destination)
+
+async def save_upload(file: UploadFile, destination: Path, kind: str) -> StoredUpload:
+    """Stream an upload to `destination`, raising 413 past the kind's size limit."""
+    limit = max_upload_bytes(kind)
+    if file.size is not None and file.size > limit:
+        raise _too_large(limit)
+
+    out, tmp = await run_in_threadpool(_open_temp, destination.parent)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        while chunk := await file.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > limit:
+                raise _too_large(limit)
+            await run_in_threadpool(_write_chunk, out, digest, chunk)
+        await run_in_threadpool(_finish, out, tmp, destination)
+    except BaseException:
+        await run_in_threadpool(_discard, out, tmp)
+        raise
+    return StoredUpload(destination, size, digest.hexdigest())
+
+class UploadLimitMiddleware:
+    """Reject request bodies over the upload limit of their route.
+
+    `routes` maps path patterns to upload kinds; other requests pass through
+    untouched.
+    """
+    def __init__(self, app: ASGIApp, routes: List[Tuple[str, str]]):
+        self.app = app
+        self.routes: List[Tuple[Pattern, str]] = [(re.compile(pattern), kind) for pattern, kind in routes]
+
+    def _kind(self, scope: Scope) -> Optional[str]:
+        if scope["type"] != "http" or scope["method"] not in ("POST", "PUT"):
+            return None
+        for pattern, kind in self.routes:
+            if pattern.fullmatch(scope["path"]):
+                return kind
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        kind = self._kind(scope)
+        if kind is None:
+            await self.app(scope, receive, send)
+            return
+
+        limit = max_upload_bytes(kind)
+        body_limit = limit + MULTIPART_OVERHEAD_BYTES
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit() and int(value) > body_limit:
+                response = JSONResponse({"detail": _too_large_detail(limit)}, status_code=413)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > body_limit:
+                    # Raised inside the form parser, FastAPI passes it on as a 413
+                    raise _too_large(limit)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,102 @@
+"""Tiled vector route overlays as gzip'd GeoJSON.
+
+Each XYZ tile holds one LineString feature per walk crossing it, built from
+the stored tracks: projected to the tile's zoom level, simplified to
+SIMPLIFY_PX pixels and clipped to the tile plus a small buffer so lines
+join up across tile edges. Tiles are cached per user data version.
+"""
+import gzip
+import json
+import math
+from typing import Iterable, List, Optional, Tuple
+import numpy as np
+from app.services.heatmap import TILE_SIZE, mercator_pixels
+from app.services.routes import LRUCache, simplify_mask
+
+MAX_VECTOR_ZOOM = 20
+
+SIMPLIFY_PX = 0.5
+
+# Clip box margin around the tile, in pixels
+BUFFER_PX = 8
+
+def lonlat_from_pixels(px: np.ndarray, py: np.ndarray, z: int) -> Tuple[np.ndarray, np.ndarray]:
+    scale = TILE_SIZE * 2 ** z
+    lon = px / scale * 360.0 - 180.0
+    lat = np.degrees(np.arctan(np.sinh(math.pi * (1 - 2 * py / scale))))
+    return lon, lat
+
+def clip_polyline(xy: np.ndarray, lo: float, hi: float) -> List[np.ndarray]:
+    """Clip a polyline to the square [lo, hi]^2 (Liang-Barsky per segment).
+
+    Returns the visible parts as separate (n, 2) arrays.
+    """
+    if len(xy) < 2:
+        return []
+    p0, d = xy[:-1], np.diff(xy, axis=0)
+    t0 = np.zeros(len(d))
+    t1 = np.ones(len(d))
+    visible = np.ones(len(d), dtype=bool)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for p, q in (
+            (-d[:, 0], p0[:, 0] - lo), (d[:, 0], hi - p0[:, 0]),
+            (-d[:, 1], p0[:, 1] - lo), (d[:, 1], hi - p0[:, 1]),
+        ):
+            ratio = q / p
+            t0 = np.where(p < 0, np.maximum(t0, ratio), t0)
+            t1 = np.where(p > 0, np.minimum(t1, ratio), t1)
+            visible &= ~((p == 0) & (q < 0))
+    visible &= t0 <= t1
+
+    start = p0 + t0[:, None] * d
+    end = p0 + t1[:, None] * d
+    parts, current = [], None
+    for i in np.flatnonzero(visible):
+        if current is not None and current[1] == i - 1 and t0[i] == 0:
+            current[0].append(end[i])
+        else:
+            if current is not None:
+                parts.append(np.array(current[0]))
+            current = [[start[i], end[i]], i]
+        current[1] = i
+        if t1[i] < 1:
+            parts.append(np.array(current[0]))
+            current = None
+    if current is not None:
+        parts.append(np.array(current[0]))
+    return parts
+
+def walk_feature(walk_id: int, distance_km: Optional[float], points: np.ndarray, z: int, x: int, y: int) -> Optional[dict]:
+    px, py = mercator_pixels(points["lat"], points["lon"], z)
+    xy = np.column_stack((px - x * TILE_SIZE, py - y * TILE_SIZE))
+    xy = xy[simplify_mask(xy, SIMPLIFY_PX)]
+    parts = clip_polyline(xy, -BUFFER_PX, TILE_SIZE + BUFFER_PX)
+    if not parts:
+        return None
+
+    lines = []
+    for part in parts:
+        lon, lat = lonlat_from_pixels(part[:, 0] + x * TILE_SIZE, part[:, 1] + y * TILE_SIZE, z)
+        lines.append(np.round(np.column_stack((lon, lat)), 6).tolist())
+    geometry = (
+        {"type": "LineString", "coordinates": lines[0]} if len(lines) == 1
+        else {"type": "MultiLineString", "coordinates": lines}
+    )
+    return {
+        "type": "Feature",
+        "id": walk_id,
+        "geometry": geometry,
+        "properties": {"walk_id": walk_id, "distance_km": distance_km},
+    }
+
+def render_vector_tile(walks: Iterable[Tuple[int, Optional[float], np.ndarray]], z: int, x: int, y: int) -> bytes:
+    """Gzip'd GeoJSON FeatureCollection of (walk_id, distance_km, points) tracks."""
+    features = []
+    for walk_id, distance_km, points in walks:
+        feature = walk_feature(walk_id, distance_km, points, z, x, y)
+        if feature is not None:
+            features.append(feature)
+    body = json.dumps({"type": "FeatureCollection", "features": features}, separators=(",", ":"))
+    return gzip.compress(body.encode("utf-8"), compresslevel=6)
+
+vector_tile_cache = LRUCache(max_entries=4096)
@@ -0,0 +1,77 @@
+"""Per dog and day walk totals (`walk_stats_daily`).
+
+Buckets are keyed by (dog_id, UTC day of the walk start). Writes re-derive
+just the buckets they touch from the walks table, in the same transaction,
+so reads cost one row per bucket no matter how many walks there are.
+"""
+from datetime import date
+from typing import Iterable, Optional, Set, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, insert, delete, func, tuple_, Date, Float, cast
+from app.models.walks import Walk, WalkDog, WalkStatsDaily
+from app.models.dogs import Dog
+
+StatKey = Tuple[int, date]
+
+GRANULARITIES = ("day", "week", "month")
+
+STATS_COLUMNS = ["dog_id", "day", "walk_count", "total_minutes", "total_distance_km"]
+
+def walk_day():
+    return cast(func.timezone("UTC", Walk.start_datetime), Date)
+
+def _stats_source():
+    day = walk_day()
+    return (
+        select(
+            WalkDog.dog_id,
+            day.label("day"),
+            func.count(Walk.id).label("walk_count"),
+            func.sum(Walk.duration_minutes).label("total_minutes"),
+            cast(func.coalesce(func.sum(Walk.distance_km), 0), Float).label("total_distance_km"),
+        )
+        .join(Walk, Walk.id == WalkDog.walk_id)
+        .group_by(WalkDog.dog_id, day)
+    )
+
+async def walk_stat_keys(db: AsyncSession, walk_ids: Iterable[int]) -> Set[StatKey]:
+    """Buckets the given walks currently count towards.
+
+    Collect them before and after a change, then sync the union.
+    """
+    walk_ids = list(walk_ids)
+    if not walk_ids:
+        return set()
+    result = await db.execute(
+        select(WalkDog.dog_id, walk_day())
+        .join(Walk, Walk.id == WalkDog.walk_id)
+        .where(Walk.id.in_(walk_ids))
+    )
+    return set(result.tuples().all())
+
+async def sync_walk_stats(db: AsyncSession, keys: Iterable[StatKey]):
+    """Recompute the given buckets; call after the write has been flushed."""
+    keys = list(keys)
+    if not keys:
+        return
+    await db.execute(
+        delete(WalkStatsDaily).where(tuple_(WalkStatsDaily.dog_id, WalkStatsDaily.day).in_(keys))
+    )
+    source = _stats_source().where(tuple_(WalkDog.dog_id, walk_day()).in_(keys))
+    await db.execute(insert(WalkStatsDaily).from_select(STATS_COLUMNS, source))
+
+async def rebuild_walk_stats(db: AsyncSession, user_id: Optional[int] = None) -> int:
+    """Drop and rebuild the rollup from the walks table (backfill/repair)."""
+    clear = delete(WalkStatsDaily)
+    source = _stats_source()
+    if user_id is not None:
+        dog_ids = select(Dog.id).where(Dog.owner_user_id == user_id)
+        clear = clear.where(WalkStatsDaily.dog_id.in_(dog_ids))
+        source = source.where(WalkDog.dog_id.in_(dog_ids))
+    await db.execute(clear)
+    result = await db.execute(insert(WalkStatsDaily).from_select(STATS_COLUMNS, source))
+    return result.rowcount
+
+async def delete_dog_walk_stats(db: AsyncSession, dog_id: int):
+    """Drop the buckets of a dog, call before deleting the dog itself."""
+    await db.execute(delete(WalkStatsDaily).where(WalkStatsDaily.dog_id == dog_id))
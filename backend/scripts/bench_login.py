@@ -0,0 +1,82 @@
+"""Login storm benchmark.
+
+Measures the latency of a cheap endpoint on its own, then again while many
+clients hit /auth/login at once. With password hashing off the event loop
+the second measurement should stay close to the first.
+
+    python scripts/bench_login.py --url http://localhost:8000 \\
+        --email admin@example.com --password secret --logins 200 --concurrency 32
+
+Standard library only, so it runs anywhere the API is reachable.
+"""
+import argparse
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def timed_get(url: str) -> float:
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+    return time.perf_counter() - started
+
+def login(url: str, email: str, password: str) -> int:
+    body = urllib.parse.urlencode({"username": email, "password": password}).encode()
+    request = urllib.request.Request(url, data=body, method="POST")
+    try:
+        with urllib.request.urlopen(request, timeout=60) as response:
+            response.read()
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def probe(url: str, samples: int, stop: threading.Event = None) -> list:
+    latencies = []
+    while len(latencies) < samples and not (stop and stop.is_set()):
+        latencies.append(timed_get(url))
+        time.sleep(0.01)
+    return latencies
+
+def summary(name: str, latencies: list):
+    ordered = sorted(latencies)
+    p95 = ordered[max(0, int(len(ordered) * 0.95) - 1)]
+    print(f"{name:<22} n={len(ordered):<5} p50={statistics.median(ordered) * 1000:7.1f} ms  "
+          f"p95={p95 * 1000:7.1f} ms  max={ordered[-1] * 1000:7.1f} ms")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--samples", type=int, default=100)
+    args = parser.parse_args()
+
+    probe_url = args.url.rstrip("/") + "/"
+    login_url = args.url.rstrip("/") + "/api/v1/auth/login"
+
+    summary("idle", probe(probe_url, args.samples))
+
+    stop = threading.Event()
+    during = []
+    prober = threading.Thread(target=lambda: during.extend(probe(probe_url, 10 ** 9, stop)))
+    started = time.perf_counter()
+    prober.start()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        statuses = list(pool.map(lambda _: login(login_url, args.email, args.password), range(args.logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    prober.join()
+
+    summary("during login storm", during)
+    ok = statuses.count(200)
+    print(f"logins: {ok}/{len(statuses)} ok in {elapsed:.1f} s ({ok / elapsed:.1f}/s), "
+          f"other statuses: {sorted(set(statuses) - {200})}")
+
+if __name__ == "__main__":
+    main()
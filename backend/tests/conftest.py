@@ -0,0 +1,5 @@
+import os
+
+# app.core.config requires these at import time
+os.environ.setdefault("DATABASE_URL", os.environ.get("TEST_DATABASE_URL", "postgresql+asyncpg://localhost/test"))
+os.environ.setdefault("SECRET_KEY", "test")
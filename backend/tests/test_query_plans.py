@@ -0,0 +1,101 @@
+"""Every route in ACCESS_PATHS is planned with an index.
+
+Needs a scratch PostgreSQL database in TEST_DATABASE_URL; its tables are
+dropped and recreated from the models.
+"""
+import asyncio
+import os
+from datetime import date, datetime, timezone
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import NullPool
+from app.models import (
+    Base, User, Dog, VetVisit, Vaccination, Invoice, CareTask, CareTaskLog,
+    TrainingGoal, BehaviorIssue, TrainingLog, EquipmentItem, Walk, WalkDog, Tag, TagAssignment
+)
+from app.models.care import IntervalType
+from app.services.query_plans import ACCESS_PATHS, USER_ID, DOG_ID, explain, full_scans
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+USERS = 3
+DOGS_PER_USER = 2
+ROWS_PER_DOG = 5
+
+def seed_rows(user_id: int, dog_id: int, n: int):
+    day = date(2024, 1, 1 + n)
+    moment = datetime(2024, 1, 1 + n, 8, tzinfo=timezone.utc)
+    owned = dict(dog_id=dog_id, owner_user_id=user_id)
+    visit = VetVisit(**owned, date=day, reason="Checkup")
+    goal = TrainingGoal(**owned, title="Recall")
+    issue = BehaviorIssue(**owned, title="Pulling", description="On the leash", severity=1)
+    task = CareTask(**owned, title="Brush", interval_type=IntervalType.DAILY, next_due_date=day)
+    walk = Walk(user_id=user_id, start_datetime=moment, duration_minutes=30)
+    return [
+        visit, goal, issue, task, walk,
+        Vaccination(**owned, date=day, vaccine_type="Rabies"),
+        Invoice(**owned, vet_visit=visit, date=day, amount=50),
+        CareTaskLog(owner_user_id=user_id, task=task, done_at=moment),
+        TrainingLog(**owned, goal=goal, behavior_issue=issue, datetime=moment),
+        EquipmentItem(**owned, name="Harness"),
+        WalkDog(walk=walk, dog_id=dog_id),
+    ]
+
+async def create_schema():
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine) as db:
+        for u in range(USERS):
+            user = User(email=f"plans{u}@example.com", password_hash="x")
+            db.add(user)
+            await db.flush()
+            tag = Tag(user_id=user.id, name="calm")
+            db.add(tag)
+            for _ in range(DOGS_PER_USER):
+                dog = Dog(owner_user_id=user.id, name="Rex")
+                db.add(dog)
+                await db.flush()
+                for n in range(ROWS_PER_DOG):
+                    db.add_all(seed_rows(user.id, dog.id, n))
+            await db.flush()
+            logs = await db.execute(text("SELECT id FROM training_logs WHERE owner_user_id = :u"), {"u": user.id})
+            db.add_all(TagAssignment(tag_id=tag.id, entity_type="TRAINING_LOG", entity_id=log_id) for log_id in logs.scalars())
+        await db.commit()
+
+    async with engine.connect() as conn:
+        await conn.execute(text("ANALYZE"))
+    await engine.dispose()
+
+async def plan_of(build):
+    engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+    try:
+        async with AsyncSession(engine) as db:
+            plan = await explain(db, build())
+            await db.rollback()
+        return plan
+    finally:
+        await engine.dispose()
+
+@pytest.fixture(scope="module", autouse=True)
+def schema():
+    asyncio.run(create_schema())
+
+def test_placeholder_ids_are_seeded():
+    async def check():
+        engine = create_async_engine(TEST_DATABASE_URL, poolclass=NullPool)
+        async with engine.connect() as conn:
+            dog = await conn.execute(text("SELECT owner_user_id FROM dogs WHERE id = :id"), {"id": DOG_ID})
+            owner = dog.scalar()
+        await engine.dispose()
+        return owner
+    assert asyncio.run(check()) == USER_ID
+
+@pytest.mark.parametrize("name, build", ACCESS_PATHS, ids=[name for name, _ in ACCESS_PATHS])
+def test_access_path_uses_index(name, build):
+    assert full_scans(asyncio.run(plan_of(build))) == []
@@ -0,0 +1,115 @@
+"""Requests report their statement count in X-DB-Queries and stay within
+`assert_max_queries` budgets.
+
+The /activity test needs a scratch PostgreSQL database in TEST_DATABASE_URL;
+its tables are dropped and recreated from the models.
+"""
+import asyncio
+import os
+from datetime import datetime, timezone
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.query_stats import QueryStatsMiddleware, assert_max_queries
+from app.core.security import create_access_token
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+
+async def call(app, path: str, headers=()):
+    """Drive one GET through the ASGI app, return (status, headers, body)."""
+    path, _, query = path.partition("?")
+    scope = {
+        "type": "http", "http_version": "1.1", "method": "GET", "scheme": "http",
+        "path": path, "raw_path": path.encode(), "root_path": "", "query_string": query.encode(),
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers],
+        "server": ("testserver", 80), "client": ("testclient", 50000),
+    }
+    response = {"body": b""}
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if requested:
+            return {"type": "http.disconnect"}
+        requested = True
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {k.decode(): v.decode() for k, v in message["headers"]}
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+def counting_app(statements: int) -> FastAPI:
+    engine = create_engine("sqlite://")
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware)
+
+    @app.get("/queries")
+    def run_queries():
+        with engine.connect() as conn:
+            for _ in range(statements):
+                conn.execute(text("SELECT 1"))
+        return {"ran": statements}
+
+    return app
+
+def test_header_counts_statements_of_the_request():
+    with assert_max_queries(3) as stats:
+        status, headers, _ = asyncio.run(call(counting_app(3), "/queries"))
+    assert status == 200
+    assert headers["x-db-queries"] == "3"
+    assert stats.count == 3
+    assert 'desc="3 queries"' in headers["server-timing"]
+
+def test_assert_max_queries_fails_over_budget():
+    with pytest.raises(AssertionError, match="Expected at most 2 queries, ran 3"):
+        with assert_max_queries(2):
+            asyncio.run(call(counting_app(3), "/queries"))
+
+async def activity_request():
+    from app.core.database import engine
+    from app.main import app
+    from app.models import Base, User, Dog, Walk, WalkDog
+    from app.services.activity import rebuild_activity
+
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+        async with AsyncSession(engine) as db:
+            user = User(email="stats@example.com", password_hash="x")
+            db.add(user)
+            await db.flush()
+            dog = Dog(owner_user_id=user.id, name="Rex")
+            db.add(dog)
+            await db.flush()
+            for day in range(1, 21):
+                walk = Walk(user_id=user.id, start_datetime=datetime(2024, 1, day, 8, tzinfo=timezone.utc), duration_minutes=30)
+                db.add_all([walk, WalkDog(walk=walk, dog_id=dog.id)])
+            await db.flush()
+            await rebuild_activity(db, user.id)
+            await db.commit()
+            user_id = user.id
+
+        auth = [("Authorization", f"Bearer {create_access_token(user_id)}")]
+        # Warm up: the first connection runs the dialect's setup statements
+        await call(app, "/api/v1/activity/", auth)
+        with assert_max_queries(2) as stats:
+            status, headers, body = await call(app, "/api/v1/activity/?limit=10", auth)
+        return status, headers, body, stats
+    finally:
+        await engine.dispose()
+
+@pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+def test_activity_page_query_budget():
+    status, headers, body, stats = asyncio.run(activity_request())
+    assert status == 200, body
+    assert headers["x-db-queries"] == str(stats.count)
+    assert 1 <= stats.count <= 2
@@ -10,10 +10,18 @@ export interface Dog {
   sex: 'MALE' | 'FEMALE' | 'UNKNOWN';
   weight_kg?: number;
   avatar_image_url?: string;
+  avatar_renditions?: AvatarRendition[];
   notes?: string;
   details?: DogProfileDetails;
 }
 
+export interface AvatarRendition {
+  url: string;
+  width: number;
+  height: number;
+  format: 'webp' | 'jpeg';
+}
+
 export interface DogProfileDetails {
   id: number;
   dog_id: number;
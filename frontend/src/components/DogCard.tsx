@@ -1,7 +1,7 @@
 import React from 'react';
 import { Link } from 'react-router-dom';
 import { Dog as DogIcon } from 'lucide-react';
-import { Dog } from '../api/hooks';
+import { Dog, AvatarRendition } from '../api/hooks';
 
 interface DogCardProps {
   dog: Dog;
@@ -9,10 +9,20 @@ interface DogCardProps {
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+const mediaUrl = (url: string) => (url.startsWith('http') ? url : `${API_URL}${url}`);
+
+const srcSet = (renditions: AvatarRendition[], format: AvatarRendition['format']) =>
+  renditions
+    .filter((r) => r.format === format)
+    .map((r) => `${mediaUrl(r.url)} ${r.width}w`)
+    .join(', ');
+
+// Cards fill one column of the dashboard grid (two columns from sm up)
+const IMAGE_SIZES = '(min-width: 640px) 50vw, 100vw';
+
 export default function DogCard({ dog }: DogCardProps) {
-  const imageUrl = dog.avatar_image_url 
-    ? (dog.avatar_image_url.startsWith('http') ? dog.avatar_image_url : `${API_URL}${dog.avatar_image_url}`)
-    : null;
+  const imageUrl = dog.avatar_image_url ? mediaUrl(dog.avatar_image_url) : null;
+  const renditions = dog.avatar_renditions || [];
 
   return (
     <Link 
@@ -20,7 +30,19 @@ export default function DogCard({ dog }: DogCardProps) {
       className="bg-white dark:bg-gray-800 rounded-xl shadow-sm hover:shadow-md transition-shadow overflow-hidden flex flex-col border dark:border-gray-700"
     >
       <div className="h-48 bg-gray-100 dark:bg-gray-700 relative">
-        {imageUrl ? (
+        {imageUrl && renditions.length > 0 ? (
+          <picture>
+            <source type="image/webp" srcSet={srcSet(renditions, 'webp')} sizes={IMAGE_SIZES} />
+            <img 
+              src={mediaUrl(renditions.find((r) => r.format === 'jpeg' && r.width >= 256)?.url || renditions[0].url)} 
+              srcSet={srcSet(renditions, 'jpeg')}
+              sizes={IMAGE_SIZES}
+              alt={dog.name} 
+              loading="lazy"
+              className="w-full h-full object-cover"
+            />
+          </picture>
+        ) : imageUrl ? (
           <img 
             src={imageUrl} 
             alt={dog.name} 
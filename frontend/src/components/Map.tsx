@@ -2,6 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { MapContainer, TileLayer, Polyline, Marker, Popup } from 'react-leaflet';
 import 'leaflet/dist/leaflet.css';
 import L from 'leaflet';
+import { api } from '../api/client';
 
 // Fix Leaflet icon issue
 import icon from 'leaflet/dist/images/marker-icon.png';
@@ -17,35 +18,46 @@ let DefaultIcon = L.icon({
 L.Marker.prototype.options.icon = DefaultIcon;
 
 interface MapProps {
-  gpxUrl?: string;
+  walkId?: number;
 }
 
-export default function Map({ gpxUrl }: MapProps) {
+interface WalkRoute {
+  polyline: string;
+}
+
+// Decode a Google encoded polyline (precision 5) into [lat, lon] pairs
+function decodePolyline(encoded: string): [number, number][] {
+  const points: [number, number][] = [];
+  let index = 0, lat = 0, lon = 0;
+  while (index < encoded.length) {
+    for (const axis of [0, 1]) {
+      let result = 0, shift = 0, byte: number;
+      do {
+        byte = encoded.charCodeAt(index++) - 63;
+        result |= (byte & 0x1f) << shift;
+        shift += 5;
+      } while (byte >= 0x20);
+      const delta = result & 1 ? ~(result >> 1) : result >> 1;
+      if (axis === 0) lat += delta; else lon += delta;
+    }
+    points.push([lat / 1e5, lon / 1e5]);
+  }
+  return points;
+}
+
+export default function Map({ walkId }: MapProps) {
   const [positions, setPositions] = useState<[number, number][]>([]);
   
   useEffect(() => {
-    if (!gpxUrl) return;
+    if (!walkId) return;
     
-    // Fetch and parse GPX
-    fetch(gpxUrl)
-      .then(res => res.text())
-      .then(str => {
-        const parser = new DOMParser();
-        const xmlDoc = parser.parseFromString(str, "text/xml");
-        const trkpts = xmlDoc.getElementsByTagName("trkpt");
-        const latlngs: [number, number][] = [];
-        
-        for (let i = 0; i < trkpts.length; i++) {
-            const lat = parseFloat(trkpts[i].getAttribute("lat") || "0");
-            const lon = parseFloat(trkpts[i].getAttribute("lon") || "0");
-            latlngs.push([lat, lon]);
-        }
-        setPositions(latlngs);
-      })
+    // Server-side simplified route, a few KB instead of the raw GPX
+    api.get<WalkRoute>(`/walks/${walkId}/route`, { params: { zoom: 16 } })
+      .then(({ data }) => setPositions(decodePolyline(data.polyline)))
       .catch(console.error);
-  }, [gpxUrl]);
+  }, [walkId]);
 
-  if (!gpxUrl || positions.length === 0) {
+  if (!walkId || positions.length === 0) {
      return <div className="h-64 bg-gray-100 flex items-center justify-center text-gray-400">No route data</div>;
   }
 
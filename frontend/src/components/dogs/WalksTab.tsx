@@ -63,7 +63,7 @@ export default function WalksTab({ dogId }: { dogId: number }) {
                     
                     {walk.gpx_file_url && (
                        <div className="mt-4 h-[400px] rounded-lg overflow-hidden border">
-                          <Map gpxUrl={`${import.meta.env.VITE_API_URL || 'http://localhost:8000'}${walk.gpx_file_url}`} />
+                          <Map walkId={walk.id} />
                        </div>
                     )}
                  </div>